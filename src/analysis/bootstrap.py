@@ -0,0 +1,267 @@
+import argparse
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from evaluation import BASELINE, LEAGUES, METHODS, SCORE_METRICS, compute_game_losses, compute_scores, compute_seasonal_briers, load_evaluation_arrays
+
+
+
+BOOTSTRAP_RESAMPLES = 10_000
+BOOTSTRAP_CHUNK_SIZE = 500
+
+# units that are resampled with replacement: whole seasons, or games within each season (keeping the number of games per season)
+BOOTSTRAP_UNITS = ["games", "seasons"]
+
+
+
+def draw_resample_weights(groups: np.ndarray, n_resamples: int, unit: str, rng: np.random.Generator) -> np.ndarray:
+    """
+    Draws bootstrap resamples as an index matrix and returns how often each game occurs in each resample.
+
+    Args:
+        groups (np.ndarray): Season code (0, 1, ...) of every game.
+        n_resamples (int): Number of resamples.
+        unit (str): "games" to resample the games of each season, or "seasons" to resample whole seasons.
+        rng (np.random.Generator): Random number generator.
+
+    Returns:
+        np.ndarray: (resamples x games) matrix of the number of times each game is drawn.
+    """
+
+    n_games = len(groups)
+    n_groups = groups.max() + 1
+    rows = np.arange(n_resamples)[:, None]
+
+    if unit == "seasons":
+        draws = rng.integers(n_groups, size=(n_resamples, n_groups))
+        season_counts = np.bincount((draws + n_groups * rows).ravel(), minlength=n_resamples * n_groups).reshape(n_resamples, n_groups)
+        return season_counts[:, groups].astype(float)
+
+    # every game is replaced by a random game of its own season
+    order = np.argsort(groups, kind="stable")
+    sizes = np.bincount(groups, minlength=n_groups)
+    starts = np.cumsum(sizes) - sizes
+    draws = order[starts[groups] + (rng.random((n_resamples, n_games)) * sizes[groups]).astype(int)]
+    return np.bincount((draws + n_games * rows).ravel(), minlength=n_resamples * n_games).reshape(n_resamples, n_games).astype(float)
+
+
+
+def resample_means(weights: np.ndarray, losses: np.ndarray, groups: np.ndarray = None) -> np.ndarray:
+    """
+    Computes the mean of every loss column in every resample as a weighted mean, skipping NaN losses.
+
+    Args:
+        weights (np.ndarray): (resamples x games) matrix returned by "draw_resample_weights".
+        losses (np.ndarray): (games x columns) loss matrix.
+        groups (np.ndarray, optional): Season code of every game to compute the means of each season separately. Defaults to None.
+
+    Returns:
+        np.ndarray: (resamples x columns) matrix of means, or (resamples x seasons x columns) with `groups`.
+    """
+
+    scored = ~np.isnan(losses)
+    values = np.where(scored, losses, 0.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if groups is None:
+            return (weights @ values) / (weights @ scored)
+
+        means = np.empty([len(weights), groups.max() + 1, losses.shape[1]])
+        for group in range(groups.max() + 1):
+            mask = groups == group
+            means[:, group] = (weights[:, mask] @ values[mask]) / (weights[:, mask] @ scored[mask])
+        return means
+
+
+
+def bootstrap_chunk(losses: np.ndarray, groups: np.ndarray, n_resamples: int, unit: str, by_group: bool, seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    Draws one chunk of resamples and evaluates it, so the memory used is bounded by the chunk size.
+
+    Args:
+        losses (np.ndarray): (games x columns) loss matrix.
+        groups (np.ndarray): Season code of every game.
+        n_resamples (int): Number of resamples of the chunk.
+        unit (str): "games" or "seasons" (see "draw_resample_weights").
+        by_group (bool): Whether to compute the means of each season separately.
+        seed (np.random.SeedSequence): Seed of the chunk.
+
+    Returns:
+        np.ndarray: Means returned by "resample_means".
+    """
+
+    weights = draw_resample_weights(groups, n_resamples, unit, np.random.default_rng(seed))
+    return resample_means(weights, losses, groups if by_group else None)
+
+
+
+def submit_bootstrap(executor: ProcessPoolExecutor, losses: np.ndarray, groups: np.ndarray, n_resamples: int, unit: str, by_group: bool,
+                     chunk_size: int, seed: np.random.SeedSequence) -> list:
+    """
+    Splits `n_resamples` resamples into chunks of at most `chunk_size` and submits them to `executor`. Every chunk has its own seed
+    spawned from `seed`, so the resamples do not depend on the number of workers.
+
+    Args:
+        executor (ProcessPoolExecutor): Executor that evaluates the chunks.
+        losses (np.ndarray): (games x columns) loss matrix.
+        groups (np.ndarray): Season code of every game.
+        n_resamples (int): Number of resamples.
+        unit (str): "games" or "seasons" (see "draw_resample_weights").
+        by_group (bool): Whether to compute the means of each season separately.
+        chunk_size (int): Maximum number of resamples per chunk.
+        seed (np.random.SeedSequence): Seed of the resamples.
+
+    Returns:
+        list: List of futures, whose concatenated results are the means of all resamples.
+    """
+
+    chunk_sizes = [min(chunk_size, n_resamples - start) for start in range(0, n_resamples, chunk_size)]
+    return [
+        executor.submit(bootstrap_chunk, losses, groups, size, unit, by_group, chunk_seed)
+        for size, chunk_seed in zip(chunk_sizes, seed.spawn(len(chunk_sizes)))
+    ]
+
+
+
+def get_intervals(futures: list, level: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Collects the resampled means of a bootstrap and returns the percentile confidence intervals.
+
+    Args:
+        futures (list): List of futures returned by "submit_bootstrap".
+        level (float): Confidence level (e.g. 0.95).
+
+    Returns:
+        np.ndarray: Lower bounds, with the shape of the means of one resample.
+        np.ndarray: Upper bounds, with the shape of the means of one resample.
+    """
+
+    means = np.concatenate([future.result() for future in futures])
+    lower, upper = np.nanquantile(means, [(1 - level) / 2, (1 + level) / 2], axis=0)
+    return lower, upper
+
+
+
+def add_interval_columns(df: pd.DataFrame, columns: list[str], lower: np.ndarray, upper: np.ndarray) -> pd.DataFrame:
+    """
+    Inserts `{column}_lower` and `{column}_upper` right after every point estimate column.
+
+    Args:
+        df (pd.DataFrame): DataFrame of point estimates.
+        columns (list[str]): Names of the point estimate columns, in the order of the last axis of `lower` and `upper`.
+        lower (np.ndarray): Lower bounds, (rows x columns).
+        upper (np.ndarray): Upper bounds, (rows x columns).
+
+    Returns:
+        pd.DataFrame: DataFrame with the confidence interval columns.
+    """
+
+    df = df.copy()
+    for i, column in enumerate(columns):
+        position = df.columns.get_loc(column)
+        df.insert(position + 1, f"{column}_lower", lower[:, i])
+        df.insert(position + 2, f"{column}_upper", upper[:, i])
+    return df
+
+
+
+def run_bootstrap(leagues: list[str], methods: list[str], n_resamples: int = BOOTSTRAP_RESAMPLES, unit: str = "games", level: float = 0.95,
+                  chunk_size: int = BOOTSTRAP_CHUNK_SIZE, workers: int = 1, seed: int = 0) -> tuple[dict[str, pd.DataFrame], dict[str, pd.DataFrame]]:
+    """
+    Computes bootstrap confidence intervals of the league scores of "evaluation.compute_scores" and of the seasonal Brier scores of
+    "evaluation.compute_seasonal_briers". The seasonal Brier scores always resample the games within each season. The chunks of
+    all leagues are evaluated on a pool of `workers` processes.
+
+    Args:
+        leagues (list[str]): List of league abbreviations with processed data.
+        methods (list[str]): List of prediction method names.
+        n_resamples (int, optional): Number of resamples. Defaults to BOOTSTRAP_RESAMPLES.
+        unit (str, optional): "games" or "seasons" (see "draw_resample_weights"), used for the league scores. Defaults to "games".
+        level (float, optional): Confidence level. Defaults to 0.95.
+        chunk_size (int, optional): Maximum number of resamples evaluated at once. Defaults to BOOTSTRAP_CHUNK_SIZE.
+        workers (int, optional): Number of worker processes. Defaults to 1.
+        seed (int, optional): Seed of the resamples. Defaults to 0.
+
+    Returns:
+        dict[str, pd.DataFrame]: Dictionary mapping each metric of SCORE_METRICS to a DataFrame with one row per league, with the
+            columns of `results/{metric}.csv` each followed by `{column}_lower` and `{column}_upper`.
+        dict[str, pd.DataFrame]: Dictionary mapping each league to a DataFrame with the columns of `results/model_seasonal_brier/{league}.csv`
+            each followed by `{column}_lower` and `{column}_upper`.
+    """
+
+    names = methods + [BASELINE]
+    seeds = dict(zip(leagues, np.random.SeedSequence(seed).spawn(len(leagues))))
+
+    point_scores = {}
+    seasonal_briers = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        score_futures = {}
+        seasonal_futures = {}
+        for league in leagues:
+            arrays = load_evaluation_arrays(Path(f"processed_data/{league}.csv"), methods)
+            point_scores[league] = compute_scores(arrays, methods)
+            seasonal_briers[league] = compute_seasonal_briers(arrays, methods)
+            score_seed, seasonal_seed = seeds[league].spawn(2)
+
+            # all score metrics are resampled together so that they share the resamples
+            losses = compute_game_losses(arrays, methods)
+            _, groups = np.unique(arrays["season"][losses["valid"]], return_inverse=True)
+            score_losses = np.hstack([losses[metric] for metric in SCORE_METRICS])
+            score_futures[league] = submit_bootstrap(executor, score_losses, groups, n_resamples, unit, False, chunk_size, score_seed)
+
+            # seasonal Brier scores of all second-half games, with the same NaN handling as "compute_seasonal_briers"
+            y = arrays["result"]
+            seasonal_losses = np.column_stack([(arrays["probs"][name] - y) ** 2 for name in names] + [(0.5 - y) ** 2])
+            _, groups = np.unique(arrays["season"], return_inverse=True)
+            seasonal_futures[league] = submit_bootstrap(executor, seasonal_losses, groups, n_resamples, "games", True, chunk_size, seasonal_seed)
+
+        score_intervals = {league: get_intervals(futures, level) for league, futures in score_futures.items()}
+        seasonal_intervals = {league: get_intervals(futures, level) for league, futures in seasonal_futures.items()}
+
+    score_tables = {}
+    for m, metric in enumerate(SCORE_METRICS):
+        columns = slice(m * len(names), (m + 1) * len(names))
+        score_df = pd.DataFrame([{"league": league, **point_scores[league][metric]} for league in leagues])
+        lower = np.array([score_intervals[league][0][columns] for league in leagues])
+        upper = np.array([score_intervals[league][1][columns] for league in leagues])
+        score_tables[metric] = add_interval_columns(score_df, names, lower, upper)
+
+    seasonal_tables = {}
+    seasonal_columns = [f"{method}_brier" for method in methods] + ["home_bias_brier", "coinflip_brier"]
+    for league in leagues:
+        lower, upper = seasonal_intervals[league]
+        seasonal_tables[league] = add_interval_columns(seasonal_briers[league], seasonal_columns, lower, upper)
+
+    return score_tables, seasonal_tables
+
+
+
+
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leagues", nargs="+", default=LEAGUES, help="leagues to evaluate (leagues without processed data are skipped)")
+    parser.add_argument("--resamples", type=int, default=BOOTSTRAP_RESAMPLES, help="number of bootstrap resamples")
+    parser.add_argument("--unit", choices=BOOTSTRAP_UNITS, default="games", help="resample games within each season or whole seasons (league scores only)")
+    parser.add_argument("--level", type=float, default=0.95, help="confidence level of the intervals")
+    parser.add_argument("--chunk-size", type=int, default=BOOTSTRAP_CHUNK_SIZE, help="maximum number of resamples evaluated at once")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the resamples")
+    parser.add_argument("--output-dir", type=Path, default=Path("results/bootstrap"), help="folder where the results are saved")
+    args = parser.parse_args()
+
+    leagues = [league for league in args.leagues if Path(f"processed_data/{league}.csv").exists()]
+    score_tables, seasonal_tables = run_bootstrap(
+        leagues, METHODS, n_resamples=args.resamples, unit=args.unit, level=args.level, chunk_size=args.chunk_size,
+        workers=args.workers, seed=args.seed
+    )
+
+    (args.output_dir / "model_seasonal_brier").mkdir(parents=True, exist_ok=True)
+    for metric, score_df in score_tables.items():
+        score_df.to_csv(args.output_dir / f"{metric}.csv", index=False)
+    for league, seasonal_df in seasonal_tables.items():
+        seasonal_df.to_csv(args.output_dir / f"model_seasonal_brier/{league}.csv", index=False)
@@ -0,0 +1,301 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+
+
+LEAGUES = ["mlb", "nba", "nfl", "nhl"]
+METHODS = ["ml", "bt"]
+
+# name of the seasonal home win baseline, which predicts the first-half home win rate of the season for every game
+BASELINE = "home_win_base"
+
+# 10 equal width probability bins used by the calibration and ROI results
+BIN_EDGES = np.linspace(0, 1, 11)
+
+# league-level scores written to `results/{metric}.csv`
+SCORE_METRICS = ["brier_score", "log_loss", "binary_accuracy"]
+
+
+
+def load_evaluation_arrays(data_file: Path, methods: list[str]) -> dict:
+    """
+    Loads a processed league file once and returns the arrays of its second-half games that every metric is computed from.
+    The first-half home win rate of each season is mapped onto the second-half games as the predictions of the baseline.
+
+    Args:
+        data_file (Path): Path object of CSV file containing league game data.
+        methods (list[str]): List of prediction method names, each with a `{method}_prob` column.
+
+    Returns:
+        dict: Dictionary with keys "season", "result", "home_ml", and "away_ml" (arrays with one value per second-half game) and
+            "probs" (dictionary mapping each method and BASELINE to its array of home win probabilities, NaN where missing).
+    """
+
+    df = pd.read_csv(data_file)
+
+    # first-half home win rate of each season
+    season_home_rate = df[df["second_half"] == 0].groupby("season")["result"].mean()
+
+    # drop all first half of regular season games
+    df = df[df["second_half"] == 1]
+
+    probs = {method: df[f"{method}_prob"].to_numpy(dtype=float) for method in methods}
+    probs[BASELINE] = df["season"].map(season_home_rate).to_numpy(dtype=float)
+
+    return {
+        "season": df["season"].to_numpy(),
+        "result": df["result"].to_numpy(),
+        "home_ml": df["home_ml"].to_numpy(dtype=float),
+        "away_ml": df["away_ml"].to_numpy(dtype=float),
+        "probs": probs
+    }
+
+
+
+def compute_game_losses(arrays: dict, methods: list[str]) -> dict[str, np.ndarray]:
+    """
+    Computes the per-game Brier score, log loss, and binary accuracy of every method and of the baseline from one (games x methods)
+    probability matrix. Only games where every method has a prediction are scored. Baseline predictions that are missing (seasons
+    without first-half games) have NaN losses, which the scores skip, and count as away predictions for the binary accuracy.
+
+    Args:
+        arrays (dict): Arrays returned by "load_evaluation_arrays".
+        methods (list[str]): List of prediction method names.
+
+    Returns:
+        dict[str, np.ndarray]: Dictionary with key "valid" (boolean mask of the scored games) and keys "brier_score", "log_loss", and
+            "binary_accuracy" mapping to (scored games x methods + 1) loss matrices with one column per method and BASELINE last.
+    """
+
+    names = methods + [BASELINE]
+    valid = np.all([~np.isnan(arrays["probs"][method]) for method in methods], axis=0)
+
+    # one contiguous column per method, so each column mean is summed exactly like a single pandas column
+    preds = np.asfortranarray(np.column_stack([arrays["probs"][name][valid] for name in names]))
+    y = arrays["result"][valid][:, None]
+
+    eps = 1e-15
+    clipped = preds.clip(eps, 1 - eps)
+
+    with np.errstate(invalid="ignore"):
+        correct = ((preds >= 0.5).astype(int) == y).astype(float)
+
+    return {
+        "valid": valid,
+        "brier_score": (preds - y) ** 2,
+        "log_loss": -(y * np.log(clipped) + (1 - y) * np.log(1 - clipped)),
+        "binary_accuracy": correct
+    }
+
+
+
+def compute_scores(arrays: dict, methods: list[str]) -> dict[str, dict[str, float]]:
+    """
+    Computes the Brier score, log loss, and binary accuracy of every method and of the baseline (see "compute_game_losses").
+
+    Args:
+        arrays (dict): Arrays returned by "load_evaluation_arrays".
+        methods (list[str]): List of prediction method names.
+
+    Returns:
+        dict[str, dict[str, float]]: Dictionary mapping "brier_score", "log_loss", and "binary_accuracy" to a dictionary from each
+            method and BASELINE to its score.
+    """
+
+    names = methods + [BASELINE]
+    losses = compute_game_losses(arrays, methods)
+    return {metric: dict(zip(names, np.nanmean(losses[metric], axis=0).tolist())) for metric in SCORE_METRICS}
+
+
+
+def compute_seasonal_briers(arrays: dict, methods: list[str]) -> pd.DataFrame:
+    """
+    Computes the Brier score of every method, the baseline, and a constant 0.5 prediction by season, skipping missing predictions.
+
+    Args:
+        arrays (dict): Arrays returned by "load_evaluation_arrays".
+        methods (list[str]): List of prediction method names.
+
+    Returns:
+        pd.DataFrame: DataFrame with the columns "season", "{method}_brier" for each method, "home_bias_brier", and "coinflip_brier".
+    """
+
+    y = arrays["result"]
+    losses = {f"{method}_brier": (arrays["probs"][method] - y) ** 2 for method in methods}
+    losses["home_bias_brier"] = (arrays["probs"][BASELINE] - y) ** 2
+    losses["coinflip_brier"] = (0.5 - y) ** 2
+
+    return pd.DataFrame(losses).groupby(arrays["season"]).mean().rename_axis("season").reset_index()
+
+
+
+def compute_calibration(arrays: dict, methods: list[str]) -> pd.DataFrame:
+    """
+    Computes the home win rate of the games in each of the 10 probability bins ([0, 0.1), [0.1, 0.2), ..., [0.9, 1)) for every method.
+    Games with a missing prediction or a prediction of exactly 1 are in no bin.
+
+    Args:
+        arrays (dict): Arrays returned by "load_evaluation_arrays".
+        methods (list[str]): List of prediction method names.
+
+    Returns:
+        pd.DataFrame: DataFrame with the columns "bin" and "{method}_winrate" for each method, NaN for empty bins.
+    """
+
+    n_bins = len(BIN_EDGES) - 1
+    result = arrays["result"]
+
+    # bin of every (game, method) offset by the method, so a single bincount covers all methods
+    bins = np.column_stack([np.digitize(arrays["probs"][method], BIN_EDGES) - 1 for method in methods])
+    in_bin = (bins >= 0) & (bins < n_bins)
+    flat_bins = (bins + n_bins * np.arange(len(methods)))[in_bin]
+    wins = np.broadcast_to(result[:, None], bins.shape)[in_bin]
+
+    counts = np.bincount(flat_bins, minlength=n_bins * len(methods))
+    win_counts = np.bincount(flat_bins, weights=wins, minlength=n_bins * len(methods))
+    with np.errstate(invalid="ignore"):
+        winrates = (win_counts / counts).reshape(len(methods), n_bins)
+
+    out_df = pd.DataFrame({"bin": range(n_bins)})
+    for i, method in enumerate(methods):
+        out_df[f"{method}_winrate"] = winrates[i]
+    return out_df
+
+
+
+def compute_bet_pnl(arrays: dict, method: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the profit or loss of a 1 unit bet on the favorite and on the underdog of every game, where the favorite is the home
+    team if the method's probability is at least 0.5. The payouts always come from the moneylines.
+
+    Args:
+        arrays (dict): Arrays returned by "load_evaluation_arrays".
+        method (str): Name of the prediction method that determines the favorite.
+
+    Returns:
+        np.ndarray: Profit or loss of betting on the favorite of every game.
+        np.ndarray: Profit or loss of betting on the underdog of every game.
+    """
+
+    home_ml = arrays["home_ml"]
+    away_ml = arrays["away_ml"]
+    home_won = arrays["result"] == 1
+
+    # payout of a winning 1 unit bet
+    home_pnl = np.where(home_won, np.where(home_ml > 0, home_ml / 100.0, 100.0 / np.abs(home_ml)), -1.0)
+    away_pnl = np.where(~home_won, np.where(away_ml > 0, away_ml / 100.0, 100.0 / np.abs(away_ml)), -1.0)
+
+    with np.errstate(invalid="ignore"):
+        is_home_fav = arrays["probs"][method] >= 0.5
+    return np.where(is_home_fav, home_pnl, away_pnl), np.where(is_home_fav, away_pnl, home_pnl)
+
+
+
+def compute_binned_roi(arrays: dict, methods: list[str]) -> dict[str, pd.DataFrame]:
+    """
+    Computes the ROI of betting on the favorite and on the underdog in each of the 10 probability bins ([0, 0.1], (0.1, 0.2], ...,
+    (0.9, 1]) of every method, using only games with the method's prediction and both moneylines.
+
+    Args:
+        arrays (dict): Arrays returned by "load_evaluation_arrays".
+        methods (list[str]): List of prediction method names.
+
+    Returns:
+        dict[str, pd.DataFrame]: Dictionary mapping each method to a DataFrame with the columns "bin", "n", "favorite_roi", and
+            "underdog_roi" (percentages rounded to 4 decimals, NaN for empty bins).
+    """
+
+    n_bins = len(BIN_EDGES) - 1
+    has_odds = ~np.isnan(arrays["home_ml"]) & ~np.isnan(arrays["away_ml"])
+
+    # one long frame of (method, bin, pnl) so all methods are aggregated by a single groupby
+    frames = []
+    for i, method in enumerate(methods):
+        probs = arrays["probs"][method]
+        valid = has_odds & ~np.isnan(probs)
+        favorite_pnl, underdog_pnl = compute_bet_pnl(arrays, method)
+        frames.append(pd.DataFrame({
+            "method": i,
+            "bin": (np.digitize(probs[valid], BIN_EDGES, right=True) - 1).clip(0, n_bins - 1),
+            "favorite_roi": favorite_pnl[valid],
+            "underdog_roi": underdog_pnl[valid]
+        }))
+
+    analysis = pd.concat(frames).groupby(["method", "bin"]).agg(
+        n=("favorite_roi", "count"),
+        favorite_roi=("favorite_roi", "mean"),
+        underdog_roi=("underdog_roi", "mean")
+    )
+
+    results = {}
+    for i, method in enumerate(methods):
+        method_df = analysis.reindex(pd.MultiIndex.from_product([[i], range(n_bins)], names=["method", "bin"]))
+        method_df = method_df.reset_index(level="method", drop=True)
+        method_df["n"] = method_df["n"].fillna(0).astype(int)
+
+        # convert to percentage
+        method_df["favorite_roi"] = (method_df["favorite_roi"] * 100).round(4)
+        method_df["underdog_roi"] = (method_df["underdog_roi"] * 100).round(4)
+        results[method] = method_df.reset_index()[["bin", "n", "favorite_roi", "underdog_roi"]]
+    return results
+
+
+
+def evaluate_league(data_file: Path, methods: list[str]) -> dict:
+    """
+    Loads a league once and computes every evaluation result from the same arrays.
+
+    Args:
+        data_file (Path): Path object of CSV file containing league game data.
+        methods (list[str]): List of prediction method names.
+
+    Returns:
+        dict: Dictionary with keys "scores" (see "compute_scores"), "seasonal_brier", "calibration", and "roi" (see
+            "compute_seasonal_briers", "compute_calibration", and "compute_binned_roi").
+    """
+
+    arrays = load_evaluation_arrays(data_file, methods)
+    return {
+        "scores": compute_scores(arrays, methods),
+        "seasonal_brier": compute_seasonal_briers(arrays, methods),
+        "calibration": compute_calibration(arrays, methods),
+        "roi": compute_binned_roi(arrays, methods)
+    }
+
+
+
+def save_evaluation(league_results: dict[str, dict], results_dir: Path) -> None:
+    """
+    Saves the evaluation results of every league to the same files as the per-metric scripts ("brier_score.py", "log_loss.py",
+    "binary_accuracy.py", "model_seasonal_brier.py", "calibration.py", and "roi.py").
+
+    Args:
+        league_results (dict[str, dict]): Dictionary mapping each league to the results returned by "evaluate_league".
+        results_dir (Path): Path object of the results folder.
+
+    Returns:
+        None
+    """
+
+    for metric in SCORE_METRICS:
+        rows = [{"league": league, **results["scores"][metric]} for league, results in league_results.items()]
+        pd.DataFrame(rows).to_csv(results_dir / f"{metric}.csv", index=False)
+
+    for league, results in league_results.items():
+        results["seasonal_brier"].to_csv(results_dir / f"model_seasonal_brier/{league}.csv", index=False)
+        results["calibration"].to_csv(results_dir / f"calibration/{league}.csv", index=False)
+        for method, roi_df in results["roi"].items():
+            output_path = results_dir / f"roi/{method}/{league}.csv"
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            roi_df.to_csv(output_path, index=False)
+
+
+
+
+
+
+
+if __name__ == "__main__":
+    league_results = {league: evaluate_league(Path(f"processed_data/{league}.csv"), METHODS) for league in LEAGUES}
+    save_evaluation(league_results, Path("results"))
@@ -1,126 +1,87 @@
 import pandas as pd
+import numpy as np
 from pathlib import Path
 
+from evaluation import LEAGUES, METHODS, compute_bet_pnl, load_evaluation_arrays
 
 
-def compute_fav_und_roi(row: pd.DataFrame) -> tuple[float, float]:
+
+# bins [0, 0.1), [0.1, 0.2), ..., [0.9, 1) with edges bin / 10 (not np.linspace, whose edges differ in the last bit)
+ROI_BIN_EDGES = np.arange(11) / 10
+
+
+
+def compute_season_binned_roi(arrays: dict, method: str) -> pd.DataFrame:
     """
-    Computes ROI for favorite and underdog based on game row.
+    Computes the ROI of betting on the favorite and on the underdog determined by prediction method, by probability bin and season.
 
     Args:
-        row (pd.DataFrame): Game data row.
+        arrays (dict): Arrays returned by "evaluation.load_evaluation_arrays".
+        method (str): String object of name of prediction method.
 
     Returns:
-        float: ROI of betting on favorite.
-        float: ROI of betting on underdog.
+        pd.DataFrame: DataFrame indexed by "bin" with the columns "season", "n", "favorite_roi", and "underdog_roi" (percentages),
+            one row per season of each bin. Games with a missing prediction or a prediction of exactly 1 are in no bin.
     """
 
-    home_is_fav = row["favorite"]
-    home_won = row["result"] == 1
+    n_bins = len(ROI_BIN_EDGES) - 1
+    bins = np.digitize(arrays["probs"][method], ROI_BIN_EDGES) - 1
+    in_bin = (bins >= 0) & (bins < n_bins)
 
-    home_ml = row["home_ml"]
-    away_ml = row["away_ml"]
+    # profit and loss of every game, NaN when the moneyline that would pay out is missing
+    favorite_pnl, underdog_pnl = compute_bet_pnl(arrays, method)
 
-    if home_is_fav:
-        fav_ml = home_ml
-        dog_ml = away_ml
-        fav_won = home_won
-    else:
-        fav_ml = away_ml
-        dog_ml = home_ml
-        fav_won = not home_won
+    games_df = pd.DataFrame({
+        "bin": bins[in_bin],
+        "season": arrays["season"][in_bin],
+        "favorite_roi": favorite_pnl[in_bin],
+        "underdog_roi": underdog_pnl[in_bin]
+    })
 
-    # favorite ROI
-    if fav_won:
-        if fav_ml < 0:
-            favorite_roi = 100 / abs(fav_ml)
-        else:
-            favorite_roi = fav_ml / 100
-    else:
-        favorite_roi = -1
+    grouped = (
+        games_df.groupby(["bin", "season"])
+                .agg(
+                    n=("season", "size"),
+                    favorite_roi=("favorite_roi", "mean"),
+                    underdog_roi=("underdog_roi", "mean")
+                )
+                .reset_index(level="season")
+    )
 
-    # underdog ROI
-    if not fav_won:
-        if dog_ml < 0:
-            underdog_roi = 100 / abs(dog_ml)
-        else:
-            underdog_roi = dog_ml / 100
-    else:
-        underdog_roi = -1
+    # convert ROI to percentages
+    grouped["favorite_roi"] = grouped["favorite_roi"] * 100
+    grouped["underdog_roi"] = grouped["underdog_roi"] * 100
 
-    return favorite_roi, underdog_roi
+    return grouped
 
 
 
-def compute_binned_roi(league: str, data_file: Path, method: str) -> None:
+def save_binned_roi(binned_roi: pd.DataFrame, output_dir: Path) -> None:
     """
-    Computes and saves the ROI of betting on favorite and underdog determined by prediction method.
-    
+    Saves the season table of every bin to `{output_dir}/bin_{bin}.csv`, with only the header for empty bins.
+
     Args:
-        league (str): String object of league abbreviation (e.g. "nfl").
-        data_file (Path): Path object of CSV file containing league game data.
-        method (str): String object of name of prediction method.
-    
+        binned_roi (pd.DataFrame): DataFrame returned by "compute_season_binned_roi".
+        output_dir (Path): Path object of folder where the bin files are saved.
+
     Returns:
         None
     """
-    
-    df = pd.read_csv(data_file)
-
-    # drop all first half of regular season games
-    df = df[df["second_half"] == 1]
-
-    # home is favorite boolean
-    df["favorite"] = df[f"{method}_prob"] >= 0.5
-
-    output_dir = Path(f"results/roi/{method}_binned/{league}")
-
-    for bin in range(10):
-        bin_df = df[
-            (df[f"{method}_prob"] >= bin / 10) &
-            (df[f"{method}_prob"] < (bin + 1) / 10)
-        ]
-
-        if bin_df.empty:
-            out_path = output_dir / f"bin_{bin}.csv"
-            pd.DataFrame(columns=["season", "n", "favorite_roi", "underdog_roi"]).to_csv(out_path, index=False)
-            continue
 
-        # compute ROI for each game
-        fav_rois = []
-        dog_rois = []
-        for _, row in bin_df.iterrows():
-            fav_roi, dog_roi = compute_fav_und_roi(row)
-            fav_rois.append(fav_roi)
-            dog_rois.append(dog_roi)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for bin in range(len(ROI_BIN_EDGES) - 1):
+        bin_df = binned_roi.loc[binned_roi.index == bin]
+        bin_df.to_csv(output_dir / f"bin_{bin}.csv", index=False)
 
-        bin_df = bin_df.copy()
-        bin_df["favorite_roi"] = fav_rois
-        bin_df["underdog_roi"] = dog_rois
 
-        # group by season
-        grouped = (
-            bin_df.groupby("season")
-                  .agg(
-                      n=("season", "count"),
-                      favorite_roi=("favorite_roi", "mean"),
-                      underdog_roi=("underdog_roi", "mean")
-                  )
-                  .reset_index()
-        )
 
-        # convert ROI to percentages
-        grouped["favorite_roi"] = grouped["favorite_roi"] * 100
-        grouped["underdog_roi"] = grouped["underdog_roi"] * 100
 
-        # save CSV
-        out_path = output_dir / f"bin_{bin}.csv"
-        grouped.to_csv(out_path, index=False)
 
 
 
 if __name__ == "__main__":
-    leagues = ["mlb", "nba", "nfl", "nhl"]
-    for league in leagues:
-        for method in ["ml", "bt"]:
-            compute_binned_roi(league, Path(f"processed_data/{league}.csv"), method)
\ No newline at end of file
+    for league in LEAGUES:
+        arrays = load_evaluation_arrays(Path(f"processed_data/{league}.csv"), METHODS)
+        for method in METHODS:
+            binned_roi = compute_season_binned_roi(arrays, method)
+            save_binned_roi(binned_roi, Path(f"results/roi/{method}_binned/{league}"))
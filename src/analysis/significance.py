@@ -0,0 +1,184 @@
+import argparse
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from scipy.stats import norm
+
+from evaluation import BASELINE, LEAGUES, METHODS, load_evaluation_arrays
+
+
+
+PERMUTATIONS = 10_000
+PERMUTATION_CHUNK_SIZE = 1000
+
+# compared pairs of prediction methods, where a positive mean difference means that the first method has the higher (worse) loss
+COMPARISONS = [("ml", "bt"), ("ml", BASELINE), ("bt", BASELINE)]
+
+LOSS_METRICS = ["brier", "log_loss"]
+
+
+
+def compute_method_losses(arrays: dict, name: str) -> dict[str, np.ndarray]:
+    """
+    Computes the Brier score and log loss of every game for one prediction method, NaN for games without a prediction.
+
+    Args:
+        arrays (dict): Arrays returned by "evaluation.load_evaluation_arrays".
+        name (str): Name of the method (or BASELINE).
+
+    Returns:
+        dict[str, np.ndarray]: Dictionary mapping "brier" and "log_loss" to the loss of every game.
+    """
+
+    probs = arrays["probs"][name]
+    y = arrays["result"]
+
+    # numerical stability
+    eps = 1e-15
+    clipped = np.clip(probs, eps, 1 - eps)
+
+    return {
+        "brier": (probs - y) ** 2,
+        "log_loss": -(y * np.log(clipped) + (1 - y) * np.log(1 - clipped))
+    }
+
+
+
+def nan_column_mean(values: np.ndarray) -> np.ndarray:
+    """
+    Computes the mean of every column skipping NaN, like np.nanmean but NaN without a warning for columns that are all NaN.
+
+    Args:
+        values (np.ndarray): (games x tests) matrix, NaN for games that are not part of a test.
+
+    Returns:
+        np.ndarray: Mean of every column, NaN for columns without values.
+    """
+
+    n_values = (~np.isnan(values)).sum(axis=0)
+    sums = np.nansum(values, axis=0)
+    return np.where(n_values > 0, sums / np.maximum(n_values, 1), np.nan)
+
+
+
+def diebold_mariano_test(differences: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Diebold-Mariano test of equal expected loss for one-step-ahead predictions, where the loss differences of the games are
+    uncorrelated and the long-run variance is their variance. The p-value is two-sided from the standard normal distribution.
+
+    Args:
+        differences (np.ndarray): (games x tests) matrix of loss differences, NaN for games that are not part of a test.
+
+    Returns:
+        np.ndarray: Test statistic of every test, NaN if the test has no games or the differences have no variance.
+        np.ndarray: Two-sided p-value of every test, NaN if the statistic is NaN.
+    """
+
+    n_games = (~np.isnan(differences)).sum(axis=0)
+    mean = nan_column_mean(differences)
+    variance = nan_column_mean((differences - mean) ** 2)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        statistic = np.where(variance > 0, mean / np.sqrt(variance / n_games), np.nan)
+    return statistic, 2 * norm.sf(np.abs(statistic))
+
+
+
+def sign_flip_test(differences: np.ndarray, n_permutations: int, rng: np.random.Generator, chunk_size: int = PERMUTATION_CHUNK_SIZE) -> np.ndarray:
+    """
+    Sign-flip permutation test of a zero mean loss difference. Under the null hypothesis the sign of every game's difference is
+    exchangeable, so the mean difference is compared with the mean differences of random sign matrices, evaluated in chunks as
+    a (permutations x games) @ (games x tests) matrix product. All tests share the sign matrices.
+
+    Args:
+        differences (np.ndarray): (games x tests) matrix of loss differences, NaN for games that are not part of a test.
+        n_permutations (int): Number of random sign matrices.
+        rng (np.random.Generator): Random number generator.
+        chunk_size (int, optional): Maximum number of sign matrices evaluated at once. Defaults to PERMUTATION_CHUNK_SIZE.
+
+    Returns:
+        np.ndarray: Two-sided p-value of every test, (1 + number of permuted means at least as extreme) / (1 + n_permutations),
+            NaN for tests without games.
+    """
+
+    # games that are not part of a test contribute zero to every permuted sum
+    values = np.nan_to_num(differences)
+    observed = np.abs(values.sum(axis=0))
+
+    # small tolerance so that permutations equal to the observed sum up to rounding count as at least as extreme
+    tolerance = 1e-12 * np.abs(values).sum(axis=0)
+
+    extreme = np.zeros(values.shape[1], dtype=int)
+    for start in range(0, n_permutations, chunk_size):
+        signs = rng.integers(2, size=(min(chunk_size, n_permutations - start), len(values)), dtype=np.int8) * 2.0 - 1.0
+        extreme += (np.abs(signs @ values) >= observed - tolerance).sum(axis=0)
+
+    n_games = (~np.isnan(differences)).sum(axis=0)
+    return np.where(n_games > 0, (1 + extreme) / (1 + n_permutations), np.nan)
+
+
+
+def compute_league_significance(arrays: dict, n_permutations: int = PERMUTATIONS, seed: int = 0) -> pd.DataFrame:
+    """
+    Tests every pair of COMPARISONS on the Brier score and log loss of every season with a Diebold-Mariano test and a sign-flip
+    permutation test. Each test uses the second-half games of the season where both methods have a prediction.
+
+    Args:
+        arrays (dict): Arrays returned by "evaluation.load_evaluation_arrays".
+        n_permutations (int, optional): Number of random sign matrices. Defaults to PERMUTATIONS.
+        seed (int, optional): Seed of the sign matrices. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: DataFrame with one row per (season, comparison, metric) and the columns below.
+            - season: season
+            - method_1, method_2: compared methods
+            - metric: "brier" or "log_loss"
+            - n: number of games
+            - mean_diff: mean loss of method_1 minus mean loss of method_2
+            - dm_stat, dm_p_value: Diebold-Mariano statistic and two-sided p-value
+            - permutation_p_value: two-sided p-value of the sign-flip permutation test.
+    """
+
+    rng = np.random.default_rng(seed)
+    tests = [(first, second, metric) for first, second in COMPARISONS for metric in LOSS_METRICS]
+    losses = {name: compute_method_losses(arrays, name) for name in METHODS + [BASELINE]}
+
+    # one column of loss differences per test, NaN where either method has no prediction
+    differences = np.column_stack([losses[first][metric] - losses[second][metric] for first, second, metric in tests])
+
+    rows = []
+    for season in np.unique(arrays["season"]):
+        season_differences = differences[arrays["season"] == season]
+        n_games = (~np.isnan(season_differences)).sum(axis=0)
+        mean_diff = nan_column_mean(season_differences)
+        dm_stat, dm_p_value = diebold_mariano_test(season_differences)
+        permutation_p_value = sign_flip_test(season_differences, n_permutations, rng)
+
+        for i, (first, second, metric) in enumerate(tests):
+            rows.append({
+                "season": season, "method_1": first, "method_2": second, "metric": metric, "n": n_games[i], "mean_diff": mean_diff[i],
+                "dm_stat": dm_stat[i], "dm_p_value": dm_p_value[i], "permutation_p_value": permutation_p_value[i]
+            })
+
+    return pd.DataFrame(rows)
+
+
+
+
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leagues", nargs="+", default=LEAGUES, help="leagues to test (leagues without processed data are skipped)")
+    parser.add_argument("--permutations", type=int, default=PERMUTATIONS, help="number of random sign matrices of the permutation test")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the sign matrices")
+    parser.add_argument("--output-dir", type=Path, default=Path("results/significance"), help="folder where the results are saved")
+    args = parser.parse_args()
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    leagues = [league for league in args.leagues if Path(f"processed_data/{league}.csv").exists()]
+    for league in leagues:
+        arrays = load_evaluation_arrays(Path(f"processed_data/{league}.csv"), METHODS)
+        significance_df = compute_league_significance(arrays, n_permutations=args.permutations, seed=args.seed)
+        significance_df.to_csv(args.output_dir / f"{league}.csv", index=False)
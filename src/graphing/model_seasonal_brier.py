@@ -4,6 +4,27 @@ from pathlib import Path
 
 
 
+def load_significant_seasons(significance_path: Path, alpha: float = 0.05) -> set[int]:
+    """
+    Loads the seasons where the moneyline and Bradley-Terry Brier scores differ significantly by the sign-flip permutation test.
+
+    Args:
+        significance_path (Path): Path object of CSV file with significance tests of the league.
+        alpha (float, optional): Significance level. Defaults to 0.05.
+
+    Returns:
+        set[int]: Set of significant seasons, empty if the file does not exist.
+    """
+
+    if not Path(significance_path).exists():
+        return set()
+
+    df = pd.read_csv(significance_path)
+    tests = df[(df["method_1"] == "ml") & (df["method_2"] == "bt") & (df["metric"] == "brier")]
+    return set(tests.loc[tests["permutation_p_value"] < alpha, "season"])
+
+
+
 def plot_brier_scores(league: str, csv_path: Path) -> None:
     """
     Plot Brier score of various models for the NFL as a line graph.
@@ -64,6 +85,18 @@ def plot_brier_scores(league: str, csv_path: Path) -> None:
             markersize=6,
         )
 
+    # mark seasons where moneyline and Bradley-Terry differ significantly
+    significant_seasons = load_significant_seasons(f"results/significance/{league}.csv")
+    for _, row in df[df["season"].isin(significant_seasons)].iterrows():
+        plt.annotate(
+            "*",
+            (row["season"], max(row["ml_brier"], row["bt_brier"])),
+            textcoords="offset points",
+            xytext=(0, 8),
+            ha="center",
+            fontsize=14
+        )
+
     plt.xlabel("Season")
     plt.ylabel("Brier Score")
     plt.title(f"{league.upper()} – Brier Scores by Season")
@@ -0,0 +1,159 @@
+import argparse
+import contextlib
+import io
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from preprocessing import clean_league_games, compute_season_bt_probs
+
+
+
+# solver configurations compared against the MM solver
+BT_SOLVER_CONFIGS = {
+    "mm": {"solver": "mm"},
+    "newton": {"solver": "newton"},
+    "newton_l2": {"solver": "newton", "l2": 0.5},
+    "newton_home": {"solver": "newton", "home_advantage": True}
+}
+
+
+
+def make_synthetic_season(n_teams: int = 400, games_per_team: int = 30, n_dates: int = 120, seed: int = 0) -> pd.DataFrame:
+    """
+    Generates a synthetic season of a large league (e.g. college basketball), where every team only plays a few of the other teams.
+    Team strengths are drawn from a log-normal distribution and every game is won according to the Bradley-Terry model.
+
+    Args:
+        n_teams (int, optional): Number of teams. Defaults to 400.
+        games_per_team (int, optional): Average number of games per team. Defaults to 30.
+        n_dates (int, optional): Number of dates the games are spread over. Defaults to 120.
+        seed (int, optional): Seed of the random number generator. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: DataFrame of games with the "Date", "home_id", "away_id", "result", and "second_half" columns used by "compute_season_bt_probs".
+    """
+
+    rng = np.random.default_rng(seed)
+    log_strengths = rng.normal(size=n_teams)
+
+    n_games = n_teams * games_per_team // 2
+    home_ids = rng.integers(n_teams, size=n_games)
+    away_ids = (home_ids + rng.integers(1, n_teams, size=n_games)) % n_teams
+    home_win_prob = 1 / (1 + np.exp(log_strengths[away_ids] - log_strengths[home_ids]))
+    day = np.sort(rng.integers(n_dates, size=n_games))
+
+    return pd.DataFrame({
+        "Date": (np.datetime64("2025-11-01") + day).astype(str),
+        "home_id": home_ids,
+        "away_id": away_ids,
+        "result": (rng.random(n_games) < home_win_prob).astype(int),
+        "second_half": (np.arange(n_games) >= n_games / 2).astype(int)
+    })
+
+
+
+def benchmark_synthetic_season(n_teams: int) -> pd.DataFrame:
+    """
+    Compares the dense MM solver (one date at a time) with the sparse MM solver on a synthetic season with many teams.
+
+    Args:
+        n_teams (int): Number of teams of the synthetic league.
+
+    Returns:
+        pd.DataFrame: DataFrame with one row per solver and the columns
+            - solver: "mm" or "sparse"
+            - iterations: total number of iterations of all dates
+            - seconds: wall time of the season
+            - max_diff: largest absolute difference of a prediction from the dense MM solver.
+    """
+
+    season_df = make_synthetic_season(n_teams=n_teams)
+
+    rows = []
+    mm_probs = None
+    for solver in ["mm", "sparse"]:
+        start = time.perf_counter()
+        bt_probs, iterations, _ = compute_season_bt_probs(season_df, solver=solver, batched=False)
+        seconds = time.perf_counter() - start
+
+        if mm_probs is None:
+            mm_probs = bt_probs
+        rows.append({"solver": solver, "iterations": iterations, "seconds": seconds, "max_diff": (bt_probs - mm_probs).abs().max()})
+
+    return pd.DataFrame(rows)
+
+
+
+def benchmark_league_solvers(clean_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Solves the Bradley-Terry estimates of every date of every season of a league with each solver configuration.
+
+    Args:
+        clean_df (pd.DataFrame): DataFrame of clean games returned by "clean_league_games".
+
+    Returns:
+        pd.DataFrame: DataFrame with one row per solver configuration and the columns
+            - solver: name of the configuration in BT_SOLVER_CONFIGS
+            - iterations: total number of iterations of all dates
+            - iterations_per_date: mean number of iterations per solved date
+            - seconds: wall time of all seasons
+            - max_diff: largest absolute difference of a second-half prediction from the MM solver.
+    """
+
+    n_dates = clean_df.groupby("Season")["Date"].nunique().sum()
+
+    rows = []
+    mm_probs = None
+    for name, config in BT_SOLVER_CONFIGS.items():
+        start = time.perf_counter()
+        results = [compute_season_bt_probs(season_df, **config) for _, season_df in clean_df.groupby("Season")]
+        seconds = time.perf_counter() - start
+
+        bt_probs = pd.concat([bt_probs for bt_probs, _, _ in results]).reindex(clean_df.index)
+        if mm_probs is None:
+            mm_probs = bt_probs
+        second_half = clean_df["second_half"] == 1
+
+        iterations = sum(n_iterations for _, n_iterations, _ in results)
+        rows.append({
+            "solver": name,
+            "iterations": iterations,
+            "iterations_per_date": iterations / n_dates,
+            "seconds": seconds,
+            "max_diff": (bt_probs[second_half] - mm_probs[second_half]).abs().max()
+        })
+
+    return pd.DataFrame(rows)
+
+
+
+
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leagues", nargs="+", default=["mlb", "nba", "nfl", "nhl"], help="leagues to benchmark (leagues without raw data are skipped)")
+    parser.add_argument("--synthetic-teams", type=int, default=400, help="number of teams of the synthetic league comparing the dense and sparse solvers (0 to skip)")
+    args = parser.parse_args()
+
+    for league in args.leagues:
+        raw_data_file = Path(f"raw_data/oddsportal_{league}.csv")
+        if not raw_data_file.exists():
+            continue
+
+        # the cleaning statistics are not part of the benchmark
+        with contextlib.redirect_stdout(io.StringIO()):
+            clean_df = clean_league_games(league, raw_data_file, Path("utility/team_abbrs.json"))
+
+        print(f"----{league}----")
+        print(benchmark_league_solvers(clean_df).to_string(index=False))
+        print("-----------\n")
+
+    if args.synthetic_teams > 0:
+        print(f"----synthetic league with {args.synthetic_teams} teams----")
+        synthetic_df = benchmark_synthetic_season(args.synthetic_teams)
+        print(synthetic_df.to_string(index=False))
+        print("-----------\n")
@@ -0,0 +1,171 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from pathlib import Path
+
+from preprocessing import clean_league_games, compute_league_bt_probs, compute_league_elo_probs, preprocess_league_games
+from run_report import RunReport
+from synthetic_league import write_synthetic_league
+
+
+
+# rating engine configurations timed on the clean games (in addition to the full preprocessing run)
+BENCHMARK_ENGINES = {
+    "bt_mm": {"bt_solver": "mm"},
+    "bt_newton": {"bt_solver": "newton", "bt_l2": 0.5},
+    "bt_sparse": {"bt_solver": "sparse"},
+    "bt_decay": {"bt_solver": "mm", "bt_decay": 0.01},
+    "elo": None
+}
+
+BENCHMARK_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+# number of teams and maximum number of games of every season of the synthetic leagues (an NBA-like regular season)
+BENCHMARK_TEAMS = 30
+BENCHMARK_GAMES_PER_SEASON = 1230
+
+
+
+def benchmark_league_size(n_games: int, engines: list[str], work_dir: Path, seed: int = 0) -> list[dict]:
+    """
+    Generates a synthetic league with about `n_games` games, times "preprocess_league_games" on it stage by stage, and then times
+    each rating engine on the clean games.
+
+    Args:
+        n_games (int): Number of games of the synthetic league, rounded up to a multiple of the number of seasons.
+        engines (list[str]): Names of the engines in BENCHMARK_ENGINES to time.
+        work_dir (Path): Path object of folder where the synthetic raw data and processed data are written.
+        seed (int, optional): Seed of the synthetic league. Defaults to 0.
+
+    Returns:
+        list[dict]: List of results with keys "games", "seasons", "teams", "benchmark", "seconds", "games_per_second", and "iterations".
+            The full run is "preprocess", its stages are "preprocess/{stage}", and the engines are named as in BENCHMARK_ENGINES.
+    """
+
+    n_seasons = -(-n_games // BENCHMARK_GAMES_PER_SEASON)
+    games_per_season = -(-n_games // n_seasons)
+    n_games = n_seasons * games_per_season
+    raw_data_file, team_abbr_file = write_synthetic_league(work_dir, n_teams=BENCHMARK_TEAMS, n_seasons=n_seasons, games_per_season=games_per_season, seed=seed)
+
+    # the cleaning statistics and per-season iterations are not part of the benchmark
+    timings = []
+    report = RunReport()
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        preprocess_league_games(raw_data_file, team_abbr_file, work_dir / "synthetic.csv", report=report)
+        timings.append(("preprocess", time.perf_counter() - start, None))
+        timings.extend((f"preprocess/{record['stage']}", record["seconds"], record["iterations"]) for record in report.stages)
+
+        clean_df = clean_league_games("synthetic", raw_data_file, team_abbr_file)
+        for engine in engines:
+            start = time.perf_counter()
+            iterations = None
+            if BENCHMARK_ENGINES[engine] is None:
+                compute_league_elo_probs(clean_df)
+            else:
+                _, _, iterations = compute_league_bt_probs(clean_df, **BENCHMARK_ENGINES[engine])
+            timings.append((engine, time.perf_counter() - start, iterations))
+
+    return [
+        {
+            "games": n_games, "seasons": n_seasons, "teams": BENCHMARK_TEAMS, "benchmark": benchmark,
+            "seconds": seconds, "games_per_second": n_games / seconds if seconds > 0 else None, "iterations": iterations
+        }
+        for benchmark, seconds, iterations in timings
+    ]
+
+
+
+def run_benchmarks(sizes: list[int], engines: list[str], seed: int = 0) -> dict:
+    """
+    Runs "benchmark_league_size" for every league size in a temporary folder.
+
+    Args:
+        sizes (list[int]): List of numbers of games.
+        engines (list[str]): Names of the engines in BENCHMARK_ENGINES to time.
+        seed (int, optional): Seed of the synthetic leagues. Defaults to 0.
+
+    Returns:
+        dict: JSON serializable dictionary with keys "created", "python", "numpy", "pandas", "platform", and "results".
+    """
+
+    results = []
+    for n_games in sizes:
+        with tempfile.TemporaryDirectory() as work_dir:
+            size_results = benchmark_league_size(n_games, engines, Path(work_dir), seed=seed)
+        for result in size_results:
+            print(f"- {result['games']:,} games, {result['benchmark']}: {result['seconds']:.2f} s ({result['games_per_second']:,.0f} games/s)")
+        results.extend(size_results)
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "results": results
+    }
+
+
+
+def compare_benchmarks(baseline: dict, current: dict) -> pd.DataFrame:
+    """
+    Compares the wall time of every (games, benchmark) pair of two benchmark runs.
+
+    Args:
+        baseline (dict): Benchmark run returned by "run_benchmarks" (e.g. loaded from a saved baseline).
+        current (dict): Benchmark run returned by "run_benchmarks".
+
+    Returns:
+        pd.DataFrame: DataFrame with the columns "games", "benchmark", "baseline_seconds", "seconds", and "ratio" (seconds / baseline_seconds)
+            for every result of `current` that is also in `baseline`.
+    """
+
+    baseline_df = pd.DataFrame(baseline["results"])[["games", "benchmark", "seconds"]].rename(columns={"seconds": "baseline_seconds"})
+    current_df = pd.DataFrame(current["results"])[["games", "benchmark", "seconds"]]
+
+    comparison = current_df.merge(baseline_df, on=["games", "benchmark"])
+    comparison["ratio"] = comparison["seconds"] / comparison["baseline_seconds"]
+    return comparison[["games", "benchmark", "baseline_seconds", "seconds", "ratio"]]
+
+
+
+
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=BENCHMARK_SIZES, help="numbers of games of the synthetic leagues")
+    parser.add_argument("--engines", nargs="+", choices=list(BENCHMARK_ENGINES), default=list(BENCHMARK_ENGINES), help="rating engines to time on the clean games")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic leagues")
+    parser.add_argument("--output", type=Path, default=Path("processed_data/benchmarks/preprocessing.json"), help="JSON file where the results are saved")
+    parser.add_argument("--baseline", type=Path, default=None, help="JSON file of an earlier run to compare the results with")
+    parser.add_argument("--max-slowdown", type=float, default=1.5, help="ratio to the baseline above which a benchmark counts as a regression")
+    args = parser.parse_args()
+
+    benchmarks = run_benchmarks(args.sizes, args.engines, seed=args.seed)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(benchmarks, f, indent=4)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            comparison = compare_benchmarks(json.load(f), benchmarks)
+
+        print("----comparison with the baseline----")
+        print(comparison.to_string(index=False))
+        print("-----------\n")
+
+        regressions = comparison[comparison["ratio"] > args.max_slowdown]
+        if not regressions.empty:
+            print(f"{len(regressions)} benchmarks are more than {args.max_slowdown}x slower than the baseline")
+            sys.exit(1)
@@ -0,0 +1,337 @@
+import numpy as np
+
+
+
+# version of the solvers, increased whenever a change can alter their results (invalidates cached strengths)
+BT_SOLVER_VERSION = 1
+
+
+
+def bt_mm_estimates(p: np.ndarray, wins: np.ndarray) -> np.ndarray:
+    """
+    Compute the unnormalized Bradley-Terry MM (minorization-maximization) strength estimates for all teams at once.
+        p_i_new = n_i / Σ_j ( (w_ij + w_ji) / (p_i + p_j) )
+        where:
+            - n_i is the total number of wins of team i
+            - w_ij is the number of wins of team i over team j (wins[i, j])
+            - p_i, p_j are current strength estimates
+    Pairs with no games between them (0 / 0) and the diagonal are skipped in the sum, matching the behaviour of the
+    original pandas implementation. Leading batch dimensions are supported, so a stack of win matrices can be updated at once.
+
+    Args:
+        p (np.ndarray): Current strength estimates for all teams (... x teams).
+        wins (np.ndarray): Square win-count matrix where wins[i, j] is the number of wins of team i over team j (... x teams x teams).
+
+    Returns:
+        np.ndarray: Updated strength estimates (not normalized).
+    """
+
+    n = wins.sum(axis=-1)
+    games = wins + np.swapaxes(wins, -1, -2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pair_sums = p[..., :, None] + p[..., None, :]
+        diagonal = np.arange(p.shape[-1])
+        pair_sums[..., diagonal, diagonal] = np.nan
+        d = np.nansum(games / pair_sums, axis=-1)
+        return n / d
+
+
+
+def bt_mm_step(p: np.ndarray, wins: np.ndarray) -> np.ndarray:
+    """
+    Perform a single Bradley-Terry MM update and normalize the strengths to sum to 1.
+
+    Args:
+        p (np.ndarray): Current strength estimates for all teams.
+        wins (np.ndarray): Square win-count matrix where wins[i, j] is the number of wins of team i over team j. Leading batch dimensions are supported.
+
+    Returns:
+        np.ndarray: Updated and normalized strength estimates.
+    """
+
+    p_new = bt_mm_estimates(p, wins)
+    return p_new / np.nansum(p_new, axis=-1, keepdims=True)
+
+
+
+def bt_mm_solve(wins: np.ndarray, p0: np.ndarray = None, max_iter: int = 100, tol: float = 1e-11) -> tuple[np.ndarray, int]:
+    """
+    Estimate Bradley-Terry strengths with vectorized MM updates until convergence.
+
+    Iteration stops once the largest absolute change of any strength between two consecutive updates is below `tol`,
+    or after `max_iter` updates.
+
+    Args:
+        wins (np.ndarray): Square win-count matrix where wins[i, j] is the number of wins of team i over team j.
+        p0 (np.ndarray, optional): Initial strength estimates. If None, all strengths start equal. Defaults to None.
+        max_iter (int, optional): Maximum number of updates to perform. Defaults to 100.
+        tol (float, optional): Convergence tolerance on the largest absolute strength change. If None, exactly `max_iter` updates are performed. Defaults to 1e-11.
+
+    Returns:
+        np.ndarray: Final normalized strength estimates.
+        int: Number of updates performed.
+    """
+
+    wins = np.asarray(wins, dtype=float)
+    p = np.ones(wins.shape[0]) if p0 is None else np.asarray(p0, dtype=float)
+
+    for iteration in range(1, max_iter + 1):
+        p_new = bt_mm_step(p, wins)
+        if tol is not None and np.nanmax(np.abs(p_new - p), initial=0.0) < tol:
+            return p_new, iteration
+        p = p_new
+
+    return p, max_iter
+
+
+
+def bt_mm_solve_batch(wins: np.ndarray, max_iter: int = 100, tol: float = 1e-11) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Estimate Bradley-Terry strengths for a stack of win matrices at once (e.g. the cumulative win matrices of every date of a season).
+
+    All snapshots are updated together with broadcasting. Each snapshot has its own convergence check, and snapshots that
+    have converged are no longer updated. Teams without any games in a snapshot get a NaN strength and do not affect the other
+    teams, which gives the same result as solving each snapshot on the submatrix of teams that have played.
+
+    Args:
+        wins (np.ndarray): Stack of square win-count matrices (snapshots x teams x teams).
+        max_iter (int, optional): Maximum number of updates to perform. Defaults to 100.
+        tol (float, optional): Convergence tolerance on the largest absolute strength change of a snapshot. If None, exactly `max_iter` updates are performed. Defaults to 1e-11.
+
+    Returns:
+        np.ndarray: Final normalized strength estimates (snapshots x teams), NaN for teams without games.
+        np.ndarray: Number of updates performed for each snapshot.
+    """
+
+    wins = np.asarray(wins, dtype=float)
+    p = np.ones(wins.shape[:2])
+    n_iterations = np.zeros(wins.shape[0], dtype=int)
+
+    # snapshots without any games have no estimate
+    active = np.flatnonzero(wins.sum(axis=(1, 2)) > 0)
+    p[wins.sum(axis=(1, 2)) == 0] = np.nan
+
+    for _ in range(max_iter):
+        if len(active) == 0:
+            break
+
+        p_new = bt_mm_step(p[active], wins[active])
+        n_iterations[active] += 1
+
+        if tol is not None:
+            with np.errstate(invalid="ignore"):
+                change = np.nanmax(np.abs(p_new - p[active]), axis=1, initial=0.0)
+            p[active] = p_new
+            active = active[~(change < tol)]
+        else:
+            p[active] = p_new
+
+    return p, n_iterations
+
+
+
+def bt_log_likelihood_terms(theta: np.ndarray, eta: np.ndarray, home_wins: np.ndarray, home_games: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compute the Bradley-Terry log-likelihood of a stack of snapshots with a shared home advantage, and the per-pair terms of its derivatives.
+        P(home team i beats away team j) = σ(θ_i - θ_j + η)
+        where:
+            - θ_i = log(p_i) is the log-strength of team i
+            - η is the log home advantage (0 for no home advantage)
+
+    Args:
+        theta (np.ndarray): Log-strengths (snapshots x teams).
+        eta (np.ndarray): Log home advantages (snapshots).
+        home_wins (np.ndarray): Win-count matrices where home_wins[i, j] is the number of wins of home team i over away team j (snapshots x teams x teams).
+        home_games (np.ndarray): Game-count matrices where home_games[i, j] is the number of games of home team i against away team j (snapshots x teams x teams).
+
+    Returns:
+        np.ndarray: Log-likelihood of each snapshot.
+        np.ndarray: Derivative of the log-likelihood with respect to each pair's logit (snapshots x teams x teams).
+        np.ndarray: Negative second derivative with respect to each pair's logit (snapshots x teams x teams).
+    """
+
+    x = theta[:, :, None] - theta[:, None, :] + eta[:, None, None]
+
+    # -log σ(x) and -log σ(-x) = -log σ(x) + x, computed without overflow
+    neg_log_s = np.logaddexp(0, -x)
+    s = np.exp(-neg_log_s)
+
+    log_likelihood = -(home_wins * neg_log_s + (home_games - home_wins) * (neg_log_s + x)).sum(axis=(1, 2))
+    return log_likelihood, home_wins - home_games * s, home_games * s * (1 - s)
+
+
+
+def bt_newton_solve(wins: np.ndarray, home_wins: np.ndarray = None, l2: float = 0.0, max_iter: int = 100, tol: float = 1e-12) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Estimate Bradley-Terry strengths by maximizing the log-likelihood with damped Newton steps on the log-strengths.
+
+    MM updates converge linearly and slow down when strengths are very uneven (e.g. an early-season team with no wins), while 
+    Newton steps converge quadratically and usually need fewer than 10 steps. Each step solves the Hessian system of every 
+    snapshot at once and halves the step until the penalized log-likelihood does not decrease.
+        - With `l2` > 0, the penalty l2/2 * Σ_i log(p_i)² pulls every team towards an average team, like adding pseudo-games 
+          against it (l2 = 0.5 is about one pseudo-win and one pseudo-loss per team). The estimate then exists even if the games 
+          so far form disconnected groups or a team has no wins.
+        - With `home_wins`, a shared home advantage factor h is estimated as well, and the home team i beats the away team j 
+          with probability p_i * h / (p_i * h + p_j). 
+    Iteration of a snapshot stops once the largest absolute change of any normalized strength (and of the log home advantage) 
+    between two consecutive steps is below `tol`, or after `max_iter` steps. Teams without games in a snapshot get a NaN strength.
+
+    Args:
+        wins (np.ndarray): Square win-count matrix where wins[i, j] is the number of wins of team i over team j. Leading batch dimensions are supported.
+        home_wins (np.ndarray, optional): Square win-count matrix (like `wins`) of only the wins of home teams, where home_wins[i, j] is the number 
+            of wins of home team i over away team j. If None, no home advantage is estimated. Defaults to None.
+        l2 (float, optional): Strength of the L2 penalty on the log-strengths. Defaults to 0.0.
+        max_iter (int, optional): Maximum number of Newton steps to perform. Defaults to 100.
+        tol (float, optional): Convergence tolerance on the largest absolute strength change. If None, exactly `max_iter` steps are performed. Defaults to 1e-12.
+
+    Returns:
+        np.ndarray: Final normalized strength estimates (same shape as `wins` without the last dimension), NaN for teams without games.
+        np.ndarray: Home advantage factor h of each snapshot (1 without `home_wins`).
+        np.ndarray: Number of Newton steps performed for each snapshot.
+    """
+
+    wins = np.asarray(wins, dtype=float)
+    batch_shape = wins.shape[:-2]
+    n_teams = wins.shape[-1]
+    wins = wins.reshape(-1, n_teams, n_teams)
+
+    # orient every game from the home team's view (or from the winner's view without home advantage)
+    if home_wins is None:
+        fit_home = False
+        h_wins = wins
+        h_games = wins
+    else:
+        fit_home = True
+        h_wins = np.asarray(home_wins, dtype=float).reshape(wins.shape)
+        h_games = h_wins + np.swapaxes(wins - h_wins, 1, 2)
+
+    n_snapshots = len(wins)
+    played = (wins.sum(axis=2) + wins.sum(axis=1)) > 0
+    theta = np.zeros([n_snapshots, n_teams])
+    eta = np.zeros(n_snapshots)
+    p = np.where(played, 1 / np.maximum(played.sum(axis=1, keepdims=True), 1), np.nan)
+    n_iterations = np.zeros(n_snapshots, dtype=int)
+
+    n_params = n_teams + fit_home
+    diagonal = np.arange(n_teams)
+
+    def objective(theta, eta, active):
+        log_likelihood, r, w = bt_log_likelihood_terms(theta, eta, h_wins[active], h_games[active])
+        return -log_likelihood + l2 / 2 * (theta ** 2).sum(axis=1), r, w
+
+    active = np.flatnonzero(played.any(axis=1))
+    f, r, w = objective(theta[active], eta[active], active)
+    for _ in range(max_iter):
+        if len(active) == 0:
+            break
+
+        mask = played[active].astype(float)
+
+        # gradient and Hessian of the penalized negative log-likelihood
+        gradient = np.zeros([len(active), n_params])
+        gradient[:, :n_teams] = -(r.sum(axis=2) - r.sum(axis=1)) + l2 * theta[active]
+        hessian = np.zeros([len(active), n_params, n_params])
+        hessian[:, :n_teams, :n_teams] = -(w + np.swapaxes(w, 1, 2))
+        hessian[:, diagonal, diagonal] += w.sum(axis=2) + w.sum(axis=1) + l2
+        if fit_home:
+            gradient[:, -1] = -r.sum(axis=(1, 2))
+            hessian[:, :n_teams, -1] = hessian[:, -1, :n_teams] = w.sum(axis=2) - w.sum(axis=1)
+            hessian[:, -1, -1] = w.sum(axis=(1, 2))
+
+        # teams without games stay fixed, and without a penalty the mean log-strength is fixed as well
+        hessian[:, diagonal, diagonal] += 1 - mask
+        hessian[:, np.arange(n_params), np.arange(n_params)] += 1e-10
+        if l2 == 0:
+            hessian[:, :n_teams, :n_teams] += mask[:, :, None] * mask[:, None, :]
+        step = -np.linalg.solve(hessian, gradient[..., None])[..., 0]
+
+        # halve the steps of snapshots where the objective would increase
+        t = np.ones(len(active))
+        for attempt in range(30):
+            new_theta = theta[active] + t[:, None] * step[:, :n_teams]
+            new_eta = eta[active] + t * step[:, -1] if fit_home else eta[active]
+            new_f, new_r, new_w = objective(new_theta, new_eta, active)
+            worse = ~(new_f <= f + 1e-12 * np.abs(f))
+            if not worse.any() or attempt == 29:
+                break
+            t[worse] /= 2
+
+        new_p = np.where(played[active], np.exp(new_theta - np.nanmax(np.where(played[active], new_theta, np.nan), axis=1, keepdims=True)), np.nan)
+        new_p /= np.nansum(new_p, axis=1, keepdims=True)
+        n_iterations[active] += 1
+
+        with np.errstate(invalid="ignore"):
+            change = np.maximum(np.nanmax(np.abs(new_p - p[active]), axis=1, initial=0.0), np.abs(new_eta - eta[active]))
+        theta[active] = new_theta
+        eta[active] = new_eta
+        p[active] = new_p
+        f, r, w = new_f, new_r, new_w
+        if tol is not None:
+            unconverged = ~(change < tol)
+            active, f, r, w = active[unconverged], f[unconverged], r[unconverged], w[unconverged]
+
+    return p.reshape(*batch_shape, n_teams), np.exp(eta).reshape(batch_shape), n_iterations.reshape(batch_shape)
+
+
+
+def bt_mm_estimates_sparse(p: np.ndarray, winner_idx: np.ndarray, loser_idx: np.ndarray, counts: np.ndarray = None) -> np.ndarray:
+    """
+    Compute the unnormalized Bradley-Terry MM strength estimates from a sparse (COO) list of win counts instead of a square matrix.
+
+    Each entry (winner_idx[k], loser_idx[k], counts[k]) adds counts[k] wins of one team over another. Entries may repeat, 
+    so a plain list of games can be passed without aggregating it first. The update is the same as in "bt_mm_estimates", 
+    but it only touches the entries, so it costs O(games) instead of O(teams²).
+
+    Args:
+        p (np.ndarray): Current strength estimates for all teams.
+        winner_idx (np.ndarray): Positions of the winning teams.
+        loser_idx (np.ndarray): Positions of the losing teams.
+        counts (np.ndarray, optional): Number of wins of each entry. If None, every entry is a single win. Defaults to None.
+
+    Returns:
+        np.ndarray: Updated strength estimates (not normalized), NaN for teams without games.
+    """
+
+    n_teams = len(p)
+    n = np.bincount(winner_idx, weights=counts, minlength=n_teams)
+
+    # every game adds to the sum of both teams
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = (1.0 if counts is None else counts) / (p[winner_idx] + p[loser_idx])
+        d = np.bincount(winner_idx, weights=terms, minlength=n_teams) + np.bincount(loser_idx, weights=terms, minlength=n_teams)
+        return n / d
+
+
+
+def bt_mm_solve_sparse(winner_idx: np.ndarray, loser_idx: np.ndarray, n_teams: int, counts: np.ndarray = None, p0: np.ndarray = None, max_iter: int = 100, tol: float = 1e-11) -> tuple[np.ndarray, int]:
+    """
+    Estimate Bradley-Terry strengths with sparse MM updates until convergence, for leagues with many teams that each play only a few opponents.
+
+    Uses the same updates and stopping rule as "bt_mm_solve", and the result agrees with it up to rounding.
+
+    Args:
+        winner_idx (np.ndarray): Positions of the winning teams.
+        loser_idx (np.ndarray): Positions of the losing teams.
+        n_teams (int): Number of teams.
+        counts (np.ndarray, optional): Number of wins of each entry. If None, every entry is a single win. Defaults to None.
+        p0 (np.ndarray, optional): Initial strength estimates. If None, all strengths start equal. Defaults to None.
+        max_iter (int, optional): Maximum number of updates to perform. Defaults to 100.
+        tol (float, optional): Convergence tolerance on the largest absolute strength change. If None, exactly `max_iter` updates are performed. Defaults to 1e-11.
+
+    Returns:
+        np.ndarray: Final normalized strength estimates, NaN for teams without games.
+        int: Number of updates performed.
+    """
+
+    p = np.ones(n_teams) if p0 is None else np.asarray(p0, dtype=float)
+
+    for iteration in range(1, max_iter + 1):
+        p_new = bt_mm_estimates_sparse(p, winner_idx, loser_idx, counts)
+        p_new /= np.nansum(p_new)
+        with np.errstate(invalid="ignore"):
+            if tol is not None and np.nanmax(np.abs(p_new - p), initial=0.0) < tol:
+                return p_new, iteration
+        p = p_new
+
+    return p, max_iter
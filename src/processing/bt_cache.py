@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+from pathlib import Path
+
+
+
+def get_bt_cache_key(labels: np.ndarray, wins: tuple[np.ndarray, np.ndarray], settings: dict, home_wins: tuple[np.ndarray, np.ndarray] = None) -> str:
+    """
+    Returns the content hash of one Bradley-Terry solve: the teams, their win counts, and the solver settings.
+
+    The win counts are hashed by team label rather than by position, and repeated games are aggregated first, so the key does not
+    depend on the order of the games or on how teams are numbered (e.g. after a team is added to the abbreviation table).
+
+    Args:
+        labels (np.ndarray): Labels (e.g. abbreviations) of the teams in the solve.
+        wins (tuple[np.ndarray, np.ndarray]): Positions in `labels` of the winner and loser of every game.
+        settings (dict): Dictionary of solver settings that the strengths depend on.
+        home_wins (tuple[np.ndarray, np.ndarray], optional): Positions of the home team and away team of every game won by the
+            home team, for solvers with home advantage. Defaults to None.
+
+    Returns:
+        str: Hexadecimal SHA-1 key.
+    """
+
+    order = np.argsort(labels)
+    rank = np.empty(len(labels), dtype=np.int64)
+    rank[order] = np.arange(len(labels))
+
+    key = hashlib.sha1(json.dumps(settings, sort_keys=True).encode())
+    key.update("\n".join(np.asarray(labels, dtype=str)[order]).encode())
+    for winner_idx, loser_idx in [wins] if home_wins is None else [wins, home_wins]:
+        codes, counts = np.unique(rank[winner_idx] * len(labels) + rank[loser_idx], return_counts=True)
+        key.update(codes.tobytes())
+        key.update(counts.astype(np.int64).tobytes())
+
+    return key.hexdigest()
+
+
+
+def get_bt_cache_file(cache_dir: Path, key: str) -> Path:
+    """
+    Returns the file of a cache entry. Entries are spread over subfolders named after the first two characters of their key.
+
+    Args:
+        cache_dir (Path): Path object of the cache folder returned by "open_bt_cache".
+        key (str): Key returned by "get_bt_cache_key".
+
+    Returns:
+        Path: Path object of the entry's ".npy" file.
+    """
+
+    return cache_dir / key[:2] / f"{key}.npy"
+
+
+
+def load_bt_cache_entry(cache_dir: Path, key: str) -> np.ndarray:
+    """
+    Loads a cache entry and marks it as recently used, so that it is evicted last.
+
+    Args:
+        cache_dir (Path): Path object of the cache folder returned by "open_bt_cache".
+        key (str): Key returned by "get_bt_cache_key".
+
+    Returns:
+        np.ndarray: Saved values, or None if there is no entry for `key`.
+    """
+
+    cache_file = get_bt_cache_file(cache_dir, key)
+    try:
+        values = np.load(cache_file)
+        os.utime(cache_file)
+    except (FileNotFoundError, ValueError, EOFError):
+        return None
+    return values
+
+
+
+def save_bt_cache_entry(cache_dir: Path, key: str, values: np.ndarray) -> None:
+    """
+    Saves a cache entry. The file is written under a temporary name and then renamed, so concurrent processes never read a partial entry.
+
+    Args:
+        cache_dir (Path): Path object of the cache folder returned by "open_bt_cache".
+        key (str): Key returned by "get_bt_cache_key".
+        values (np.ndarray): Values to save.
+
+    Returns:
+        None
+    """
+
+    cache_file = get_bt_cache_file(cache_dir, key)
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_file = cache_file.with_name(f"{cache_file.stem}.{os.getpid()}.tmp")
+    with open(temp_file, "wb") as f:
+        np.save(f, values)
+    os.replace(temp_file, cache_file)
+
+
+
+def prune_bt_cache(cache_dir: Path, max_bytes: int) -> int:
+    """
+    Deletes the least recently used entries until the cache is no larger than `max_bytes`.
+
+    Args:
+        cache_dir (Path): Path object of the cache folder returned by "open_bt_cache".
+        max_bytes (int): Maximum total size of the entries in bytes.
+
+    Returns:
+        int: Number of deleted entries.
+    """
+
+    entries = []
+    for cache_file in cache_dir.glob("*/*.npy"):
+        stat = cache_file.stat()
+        entries.append((stat.st_mtime, stat.st_size, cache_file))
+
+    total_bytes = sum(size for _, size, _ in entries)
+    n_deleted = 0
+    for _, size, cache_file in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        cache_file.unlink(missing_ok=True)
+        total_bytes -= size
+        n_deleted += 1
+
+    return n_deleted
+
+
+
+def open_bt_cache(cache_root: Path, version: int) -> Path:
+    """
+    Returns the cache folder of a solver version, and deletes the folders of all other versions because their entries can no longer be used.
+
+    Args:
+        cache_root (Path): Path object of the folder containing the cache folder of every version.
+        version (int): Version of the Bradley-Terry solvers.
+
+    Returns:
+        Path: Path object of the cache folder of `version`.
+    """
+
+    cache_dir = cache_root / f"v{version}"
+    if cache_root.exists():
+        for old_dir in cache_root.glob("v*"):
+            if old_dir != cache_dir and old_dir.is_dir():
+                shutil.rmtree(old_dir, ignore_errors=True)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
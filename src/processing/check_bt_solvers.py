@@ -0,0 +1,157 @@
+import argparse
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from benchmark_bt_solvers import BT_SOLVER_CONFIGS, make_synthetic_season
+from bradley_terry import BT_SOLVER_VERSION
+from bt_cache import open_bt_cache
+from preprocessing import compute_season_bt_probs
+
+
+
+# largest allowed difference between predictions that should be the same up to rounding
+CHECK_MAX_DIFF = 1e-9
+
+# solver configurations whose cached results are checked
+CHECK_SOLVER_CONFIGS = {**BT_SOLVER_CONFIGS, "sparse": {"solver": "sparse"}}
+
+
+
+def check_sparse_parity(n_teams: int = 400) -> float:
+    """
+    Solves a synthetic season of a large league with the dense MM solver (one date at a time) and with the sparse MM solver.
+
+    Args:
+        n_teams (int, optional): Number of teams of the synthetic league. Defaults to 400.
+
+    Returns:
+        float: Largest absolute difference between the predictions of the two solvers.
+    """
+
+    season_df = make_synthetic_season(n_teams=n_teams)
+    mm_probs, _, _ = compute_season_bt_probs(season_df, solver="mm", batched=False)
+    sparse_probs, _, _ = compute_season_bt_probs(season_df, solver="sparse")
+    return (sparse_probs - mm_probs).abs().max()
+
+
+
+def check_cache_reuse(season_df: pd.DataFrame, config: dict) -> tuple[float, int]:
+    """
+    Solves a season without the Bradley-Terry cache and then twice with an initially empty cache, where the second cached run 
+    should load every date from the cache.
+
+    Args:
+        season_df (pd.DataFrame): DataFrame of games with the columns used by "compute_season_bt_probs".
+        config (dict): Keyword arguments of "compute_season_bt_probs" (e.g. {"solver": "newton", "home_advantage": True}).
+
+    Returns:
+        float: Largest absolute difference between the predictions of either cached run and the uncached run.
+        int: Number of iterations of the second cached run.
+    """
+
+    bt_probs, _, _ = compute_season_bt_probs(season_df, **config)
+    with tempfile.TemporaryDirectory() as cache_root:
+        cache_dir = open_bt_cache(Path(cache_root), BT_SOLVER_VERSION)
+        first_probs, _, _ = compute_season_bt_probs(season_df, cache_dir=cache_dir, **config)
+        second_probs, n_iterations, _ = compute_season_bt_probs(season_df, cache_dir=cache_dir, **config)
+
+    max_diff = max((first_probs - bt_probs).abs().max(), (second_probs - bt_probs).abs().max())
+    return max_diff, n_iterations
+
+
+
+def drop_last_dates(season_df: pd.DataFrame, n_dates: int) -> pd.DataFrame:
+    """
+    Removes the games of the last dates of a synthetic season and recomputes which games are in the second half, like a rerun 
+    of the preprocessing after games were removed from the raw data.
+
+    Args:
+        season_df (pd.DataFrame): DataFrame of games returned by "make_synthetic_season".
+        n_dates (int): Number of dates to remove.
+
+    Returns:
+        pd.DataFrame: DataFrame of the remaining games.
+    """
+
+    last_dates = np.sort(season_df["Date"].unique())[-n_dates:]
+    season_df = season_df[~season_df["Date"].isin(last_dates)].reset_index(drop=True)
+    return season_df.assign(second_half=(np.arange(len(season_df)) >= len(season_df) / 2).astype(int))
+
+
+
+def check_incremental_reuse(old_df: pd.DataFrame, new_df: pd.DataFrame) -> float:
+    """
+    Solves the second-half games of a season, then solves a changed version of the season with the saved state of the first 
+    run and without it.
+
+    Args:
+        old_df (pd.DataFrame): DataFrame of the games of the first run.
+        new_df (pd.DataFrame): DataFrame of the games of the second run.
+
+    Returns:
+        float: Largest absolute difference between the predictions with and without the saved state, infinite if a prediction 
+            is missing in only one of them.
+    """
+
+    _, _, saved_state = compute_season_bt_probs(old_df, eval_subset="second_half")
+    reused_probs, _, _ = compute_season_bt_probs(new_df, eval_subset="second_half", saved_state=saved_state)
+    bt_probs, _, _ = compute_season_bt_probs(new_df, eval_subset="second_half")
+
+    diff = (reused_probs - bt_probs).abs()
+    diff[reused_probs.isna() != bt_probs.isna()] = np.inf
+    return diff.max()
+
+
+
+def print_check(name: str, passed: bool, detail: str) -> bool:
+    """
+    Prints the outcome of a check.
+
+    Args:
+        name (str): Description of the check.
+        passed (bool): Whether the check passed.
+        detail (str): Measured values behind the outcome.
+
+    Returns:
+        bool: `passed`.
+    """
+
+    print(f"- {'ok' if passed else 'FAILED'}: {name} ({detail})")
+    return passed
+
+
+
+
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--synthetic-teams", type=int, default=400, help="number of teams of the synthetic league of the sparse solver check")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sparse_diff = check_sparse_parity(args.synthetic_teams)
+    passed = [
+        print_check(f"sparse solver matches the dense MM solver on {args.synthetic_teams} teams", sparse_diff < CHECK_MAX_DIFF, f"max difference {sparse_diff:.3g}")
+    ]
+
+    season_df = make_synthetic_season(n_teams=30, games_per_team=40, n_dates=100)
+    for name, config in CHECK_SOLVER_CONFIGS.items():
+        cache_diff, n_iterations = check_cache_reuse(season_df, config)
+        passed.append(print_check(f"{name} predictions are reused from the cache", cache_diff < CHECK_MAX_DIFF and n_iterations == 0,
+                                  f"max difference {cache_diff:.3g}, {n_iterations} iterations on rerun"))
+
+    shrunk_df = drop_last_dates(season_df, 10)
+    for name, old_df, new_df in [("removed", season_df, shrunk_df), ("added", shrunk_df, season_df)]:
+        reuse_diff = check_incremental_reuse(old_df, new_df)
+        passed.append(print_check(f"saved state gives the same second-half predictions after the last dates are {name}", reuse_diff < CHECK_MAX_DIFF,
+                                  f"max difference {reuse_diff:.3g}"))
+    print(f"{sum(passed)} of {len(passed)} checks passed in {time.perf_counter() - start:.1f} seconds")
+
+    if not all(passed):
+        sys.exit(1)
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from game_table import GAME_TABLE_DTYPES, PROB_METHODS, GameTable
+
+
+
+def save_columnar(table: GameTable, league_dir: Path) -> None:
+    """
+    Saves a GameTable as a typed columnar store: one ".npy" file per column, "{method}_prob.npy" per prediction method, and "teams.npy".
+        - date is stored as the number of days since 1970-01-01
+        - teams are stored as integer ids, the positions of their abbreviations in "teams.npy"
+        - missing probabilities are stored as NaN
+    The "game_url" column is only kept in the CSV file. Prediction files of methods that `table` does not have (e.g. "bt_decay_prob.npy" 
+    from an earlier run) are deleted.
+
+    Args:
+        table (GameTable): GameTable of processed games.
+        league_dir (Path): Path object of folder where the columns are saved.
+
+    Returns:
+        None
+    """
+
+    league_dir.mkdir(parents=True, exist_ok=True)
+    for prob_file in league_dir.glob("*_prob.npy"):
+        prob_file.unlink()
+
+    for column in GAME_TABLE_DTYPES:
+        np.save(league_dir / f"{column}.npy", getattr(table, column))
+    for method, probs in table.probs.items():
+        np.save(league_dir / f"{method}_prob.npy", probs)
+    np.save(league_dir / "teams.npy", table.teams)
+
+
+
+def load_columnar(league_dir: Path, mmap: bool = True) -> dict[str, np.ndarray]:
+    """
+    Loads a league's columnar store. With memory mapping, columns are only read from disk when they are accessed.
+
+    Args:
+        league_dir (Path): Path object of folder containing the columns.
+        mmap (bool, optional): If True, columns are memory mapped read-only. Defaults to True.
+
+    Returns:
+        dict[str, np.ndarray]: Dictionary mapping column name (including every "{method}_prob" column, and "teams") to its array.
+    """
+
+    mmap_mode = "r" if mmap else None
+    columns = {column: np.load(league_dir / f"{column}.npy", mmap_mode=mmap_mode) for column in GAME_TABLE_DTYPES}
+
+    # prediction methods in the column order of the processed data, unknown methods last
+    methods = [prob_file.name.removesuffix("_prob.npy") for prob_file in league_dir.glob("*_prob.npy")]
+    methods.sort(key=lambda method: (PROB_METHODS.index(method) if method in PROB_METHODS else len(PROB_METHODS), method))
+    for method in methods:
+        columns[f"{method}_prob"] = np.load(league_dir / f"{method}_prob.npy", mmap_mode=mmap_mode)
+
+    columns["teams"] = np.load(league_dir / "teams.npy")
+    return columns
+
+
+
+def load_game_table(league_dir: Path, mmap: bool = True) -> GameTable:
+    """
+    Loads a league's columnar store as a GameTable. With memory mapping, the columns of the GameTable are read-only memory maps.
+
+    Args:
+        league_dir (Path): Path object of folder containing the columns.
+        mmap (bool, optional): If True, columns are memory mapped read-only. Defaults to True.
+
+    Returns:
+        GameTable: GameTable of processed games.
+    """
+
+    columns = load_columnar(league_dir, mmap=mmap)
+    return GameTable(
+        **{column: columns[column] for column in GAME_TABLE_DTYPES},
+        probs={column.removesuffix("_prob"): values for column, values in columns.items() if column.endswith("_prob")},
+        teams=columns["teams"]
+    )
+
+
+
+def load_columnar_frame(league_dir: Path) -> pd.DataFrame:
+    """
+    Loads a league's columnar store as a DataFrame with the same columns as `processed_data/{league}.csv` (except "game_url").
+
+    Args:
+        league_dir (Path): Path object of folder containing the columns.
+
+    Returns:
+        pd.DataFrame: DataFrame of processed games.
+    """
+
+    return load_game_table(league_dir).to_pandas()
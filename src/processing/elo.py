@@ -0,0 +1,94 @@
+import numpy as np
+
+
+
+# default Elo settings
+ELO_INITIAL = 1500.0
+ELO_SCALE = 400.0
+ELO_K = 20.0
+ELO_HOME_ADVANTAGE = 100.0
+ELO_REGRESSION = 0.25
+
+
+
+def elo_expected(rating_diff: np.ndarray) -> np.ndarray:
+    """
+    Compute the Elo win probability of a team that is `rating_diff` rating points stronger than its opponent.
+        P = 1 / (1 + 10^(-rating_diff / 400))
+
+    Args:
+        rating_diff (np.ndarray): Rating difference (including any home advantage).
+
+    Returns:
+        np.ndarray: Win probability.
+    """
+
+    return 1 / (1 + 10 ** (-rating_diff / ELO_SCALE))
+
+
+
+def compute_elo_probs(dates: np.ndarray, seasons: np.ndarray, home_ids: np.ndarray, away_ids: np.ndarray, results: np.ndarray,
+                      k: float | np.ndarray = ELO_K, home_advantage: float | np.ndarray = ELO_HOME_ADVANTAGE,
+                      regression: float | np.ndarray = ELO_REGRESSION) -> np.ndarray:
+    """
+    Computes pre-game Elo win probabilities of the home team for every game in a single pass over the games.
+
+    The ratings of all teams are held in a NumPy array indexed by team id, and the games are processed one date at a time:
+    the probabilities of all games on a date are computed from the ratings before that date, and then all ratings are updated
+        r_home += K * (result - P),  r_away -= K * (result - P)
+    where P = "elo_expected"(r_home + home_advantage - r_away). Like "bt_prob", a game therefore never uses results from its
+    own date. Every team starts at 1500, and before each new season all ratings are moved a fraction `regression` of the way
+    back to 1500.
+
+    `k`, `home_advantage`, and `regression` can also be arrays of the same length (one entry per setting). All settings are then
+    updated together as a (settings x teams) rating array during the same pass, so evaluating a whole parameter grid costs
+    little more than a single setting.
+
+    Args:
+        dates (np.ndarray): Dates of the games as sortable values (e.g. "yyyy-mm-dd" strings).
+        seasons (np.ndarray): Seasons of the games.
+        home_ids (np.ndarray): Integer team ids of the home teams.
+        away_ids (np.ndarray): Integer team ids of the away teams.
+        results (np.ndarray): 1 if the home team won and 0 if the away team won.
+        k (float | np.ndarray, optional): K-factor, the largest possible rating change of a game. Defaults to 20.
+        home_advantage (float | np.ndarray, optional): Rating points added to the home team. Defaults to 100.
+        regression (float | np.ndarray, optional): Fraction of the distance to 1500 that is removed between seasons. Defaults to 0.25.
+
+    Returns:
+        np.ndarray: Probability that the home team wins for each game, in the order of the input (games), or (games x settings) if any setting is an array.
+    """
+
+    is_grid = any(np.ndim(setting) > 0 for setting in [k, home_advantage, regression])
+    k, home_advantage, regression = (np.atleast_1d(np.asarray(setting, dtype=float)) for setting in np.broadcast_arrays(k, home_advantage, regression))
+
+    home_ids = np.asarray(home_ids)
+    away_ids = np.asarray(away_ids)
+    results = np.asarray(results, dtype=float)
+    seasons = np.asarray(seasons)
+
+    ratings = np.full([len(k), max(home_ids.max(initial=-1), away_ids.max(initial=-1)) + 1], ELO_INITIAL)
+    probs = np.empty([len(home_ids), len(k)])
+
+    # positions of the games of each distinct date, in date order
+    _, date_codes = np.unique(dates, return_inverse=True)
+    order = np.argsort(date_codes, kind="stable")
+    date_games = np.split(order, np.flatnonzero(np.diff(date_codes[order])) + 1) if len(order) else []
+
+    season = None
+    for games in date_games:
+        # regress towards the mean between seasons
+        if seasons[games[0]] != season:
+            if season is not None:
+                ratings -= regression[:, None] * (ratings - ELO_INITIAL)
+            season = seasons[games[0]]
+
+        home = home_ids[games]
+        away = away_ids[games]
+        p = elo_expected(ratings[:, home] + home_advantage[:, None] - ratings[:, away])
+        probs[games] = p.T
+
+        change = k[:, None] * (results[games] - p)
+        np.add.at(ratings, (slice(None), home), change)
+        np.add.at(ratings, (slice(None), away), -change)
+
+    return probs if is_grid else probs[:, 0]
@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+
+
+
+# dtype of every game column of a GameTable
+GAME_TABLE_DTYPES = {
+    "date": np.int32,
+    "season": np.int16,
+    "second_half": np.int8,
+    "home_id": np.int32,
+    "away_id": np.int32,
+    "result": np.int8,
+    "home_ml": np.int16,
+    "away_ml": np.int16,
+    "bookmaker_profit": np.float64
+}
+
+# known prediction methods, in the column order of the processed data
+PROB_METHODS = ["ml", "bt", "bt_decay", "elo"]
+
+
+
+@dataclass(slots=True)
+class GameTable:
+    """
+    Typed, array-backed table of the processed games of a league, with one NumPy array per column.
+        - date: int32 days since 1970-01-01
+        - season: int16 year the season ended
+        - second_half, result: int8 1/0 booleans
+        - home_id, away_id: int32 team ids, the positions of the team abbreviations in `teams`
+        - home_ml, away_ml: int16 moneylines
+        - bookmaker_profit: float64
+        - probs: dictionary mapping prediction method (e.g. "bt") to its float64 probabilities that the home team wins, NaN if missing
+        - teams: abbreviations that the team ids refer to.
+    The arrays can be passed directly to the rating engines and metrics, and can be memory mapped (see "columnar_store.py").
+    """
+
+    date: np.ndarray
+    season: np.ndarray
+    second_half: np.ndarray
+    home_id: np.ndarray
+    away_id: np.ndarray
+    result: np.ndarray
+    home_ml: np.ndarray
+    away_ml: np.ndarray
+    bookmaker_profit: np.ndarray
+    probs: dict[str, np.ndarray] = field(default_factory=dict)
+    teams: np.ndarray = field(default_factory=lambda: np.array([], dtype=str))
+
+
+    def __post_init__(self) -> None:
+        # arrays that already have the right dtype (e.g. memory mapped columns) are not copied
+        for column, dtype in GAME_TABLE_DTYPES.items():
+            setattr(self, column, np.asarray(getattr(self, column), dtype=dtype))
+        self.probs = {method: np.asarray(probs, dtype=np.float64) for method, probs in self.probs.items()}
+        self.teams = np.asarray(self.teams, dtype=str)
+
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+
+    def select(self, rows: np.ndarray) -> "GameTable":
+        """
+        Returns the games selected by a boolean mask or by positions.
+
+        Args:
+            rows (np.ndarray): Boolean mask or integer positions of the games.
+
+        Returns:
+            GameTable: New GameTable of the selected games.
+        """
+
+        return GameTable(
+            **{column: getattr(self, column)[rows] for column in GAME_TABLE_DTYPES},
+            probs={method: probs[rows] for method, probs in self.probs.items()},
+            teams=self.teams
+        )
+
+
+    def dates(self) -> np.ndarray:
+        """
+        Returns the dates of the games as datetime64[D].
+
+        Returns:
+            np.ndarray: Dates of the games.
+        """
+
+        return self.date.astype("datetime64[D]")
+
+
+    @classmethod
+    def from_pandas(cls, df: pd.DataFrame, teams: list[str] = None) -> "GameTable":
+        """
+        Builds a GameTable from a DataFrame with the columns of `processed_data/{league}.csv`. Every "{method}_prob" column is
+        kept as a prediction method, and the "game_url" column is dropped.
+
+        Args:
+            df (pd.DataFrame): DataFrame of processed games.
+            teams (list[str], optional): List of team abbreviations that the team ids refer to. If None, the sorted abbreviations of the games are used. Defaults to None.
+
+        Returns:
+            GameTable: GameTable of the games.
+        """
+
+        if teams is None:
+            teams = sorted(set(df["home_team"]) | set(df["away_team"]))
+        home_id = pd.Categorical(df["home_team"], categories=teams).codes
+        away_id = pd.Categorical(df["away_team"], categories=teams).codes
+        if (home_id < 0).any() or (away_id < 0).any():
+            raise ValueError("Games contain teams that are not in the team list")
+
+        for column in ["home_ml", "away_ml"]:
+            limits = np.iinfo(GAME_TABLE_DTYPES[column])
+            if not df[column].between(limits.min, limits.max).all():
+                raise ValueError(f"{column} values do not fit into {np.dtype(GAME_TABLE_DTYPES[column])}")
+
+        return cls(
+            date=np.asarray(df["date"].to_numpy(dtype=str), dtype="datetime64[D]").astype(np.int64),
+            season=df["season"].to_numpy(),
+            second_half=df["second_half"].to_numpy(),
+            home_id=home_id,
+            away_id=away_id,
+            result=df["result"].to_numpy(),
+            home_ml=df["home_ml"].to_numpy(),
+            away_ml=df["away_ml"].to_numpy(),
+            bookmaker_profit=df["bookmaker_profit"].to_numpy(dtype=float),
+            probs={column.removesuffix("_prob"): df[column].to_numpy(dtype=float, na_value=np.nan) for column in df.columns if column.endswith("_prob")},
+            teams=teams
+        )
+
+
+    def to_pandas(self) -> pd.DataFrame:
+        """
+        Returns the games as a DataFrame with the columns of `processed_data/{league}.csv` (except "game_url").
+
+        Returns:
+            pd.DataFrame: DataFrame of processed games.
+        """
+
+        return pd.DataFrame({
+            "date": self.dates().astype(str),
+            "season": self.season,
+            "second_half": self.second_half,
+            "home_team": self.teams[self.home_id],
+            "away_team": self.teams[self.away_id],
+            "result": self.result,
+            "home_ml": self.home_ml,
+            "away_ml": self.away_ml,
+            "bookmaker_profit": self.bookmaker_profit,
+            **{f"{method}_prob": probs for method, probs in self.probs.items()}
+        })
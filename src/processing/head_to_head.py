@@ -0,0 +1,102 @@
+import numpy as np
+
+
+
+def build_head_to_head_index(dates: np.ndarray, winner_ids: np.ndarray, loser_ids: np.ndarray, weights: np.ndarray = None) -> dict:
+    """
+    Builds a prefix-sum index of the head-to-head win matrices of a season at every distinct date.
+
+    The index stacks one cumulative win-count matrix per distinct date, so the win matrix before (or up to) any date is found
+    with a binary search over the dates and a single slice, instead of regrouping all previous games. Slice k holds the wins from
+    all games played on the first k distinct dates, so slice 0 is all zeros and the last slice holds the whole season.
+
+    Memory footprint: (dates + 1) x teams x teams int16 entries. An MLB-size season (30 teams, about 180 dates) takes
+    181 * 30 * 30 * 2 bytes = 326 KB, and an NBA or NHL season (30-32 teams, about 165 dates) takes 300-340 KB.
+
+    Args:
+        dates (np.ndarray): Dates of the games. Any sortable values (e.g. "yyyy-mm-dd" strings or day numbers).
+        winner_ids (np.ndarray): Integer team ids of the winning teams.
+        loser_ids (np.ndarray): Integer team ids of the losing teams.
+        weights (np.ndarray, optional): Number of wins each game counts for, e.g. 0/1 to only count some of the games while keeping the 
+            dates and teams of all games. Non-integer weights are summed as float64. If None, every game counts once. Defaults to None.
+
+    Returns:
+        dict: Dictionary with keys
+            - "dates": sorted distinct dates
+            - "team_ids": sorted distinct team ids; matrix row/column i belongs to team_ids[i]
+            - "cumulative_wins": (dates + 1) x teams x teams array where cumulative_wins[k, i, j] is the number of wins of team i over team j on the first k dates.
+    """
+
+    unique_dates, date_codes = np.unique(dates, return_inverse=True)
+    team_ids = np.unique(np.concatenate([winner_ids, loser_ids]))
+    winner_idx = np.searchsorted(team_ids, winner_ids)
+    loser_idx = np.searchsorted(team_ids, loser_ids)
+
+    # wins on each date, shifted by one so that slice k only holds games before the k-th date
+    dtype = np.int16 if weights is None or np.asarray(weights).dtype.kind in "biu" else np.float64
+    cumulative_wins = np.zeros([len(unique_dates) + 1, len(team_ids), len(team_ids)], dtype=dtype)
+    np.add.at(cumulative_wins, (date_codes + 1, winner_idx, loser_idx), 1 if weights is None else np.asarray(weights, dtype=dtype))
+    np.cumsum(cumulative_wins, axis=0, out=cumulative_wins)
+
+    return {"dates": unique_dates, "team_ids": team_ids, "cumulative_wins": cumulative_wins}
+
+
+
+def get_wins_before(index: dict, date, inclusive: bool = False) -> np.ndarray:
+    """
+    Returns the win-count matrix of all games played before a date.
+
+    Args:
+        index (dict): Index returned by "build_head_to_head_index".
+        date: Date to look up, of the same type as the dates of the index. It does not need to be a date with games.
+        inclusive (bool, optional): If True, games played on `date` are included. Defaults to False.
+
+    Returns:
+        np.ndarray: teams x teams win-count matrix (a read-only view into the index) where entry [i, j] is the number of wins of team index["team_ids"][i] over team index["team_ids"][j].
+    """
+
+    k = np.searchsorted(index["dates"], date, side="right" if inclusive else "left")
+    wins = index["cumulative_wins"][k]
+    wins.flags.writeable = False
+    return wins
+
+
+
+def build_decayed_head_to_head_index(days: np.ndarray, winner_ids: np.ndarray, loser_ids: np.ndarray, decay: float, weights: np.ndarray = None) -> dict:
+    """
+    Builds the time-decayed head-to-head win matrices of a season at every distinct date, where a game played `age` days 
+    before a date counts as exp(-decay * age) wins on that date.
+
+    The matrices are updated incrementally instead of being rebuilt for every date: the matrix of a date is the matrix of the 
+    previous date plus the previous date's games, decayed by the number of days between the two dates.
+        W_k = exp(-decay * (day_k - day_{k-1})) * (W_{k-1} + G_{k-1})
+    Slice k holds the decayed wins of all games played before the k-th date, as seen on that date, and the last slice holds 
+    all games of the season as seen on the last date. The result has the same keys as "build_head_to_head_index" (with float64 
+    win counts), so "get_wins_before" can be used for the dates of the index.
+
+    Args:
+        days (np.ndarray): Dates of the games as integer day numbers (e.g. days since 1970-01-01).
+        winner_ids (np.ndarray): Integer team ids of the winning teams.
+        loser_ids (np.ndarray): Integer team ids of the losing teams.
+        decay (float): Decay rate per day. 0 gives the same win counts as "build_head_to_head_index".
+        weights (np.ndarray, optional): Number of wins each game counts for before decay. If None, every game counts once. Defaults to None.
+
+    Returns:
+        dict: Dictionary with keys "dates", "team_ids", and "cumulative_wins" as in "build_head_to_head_index".
+    """
+
+    unique_days, date_codes = np.unique(days, return_inverse=True)
+    team_ids = np.unique(np.concatenate([winner_ids, loser_ids]))
+    winner_idx = np.searchsorted(team_ids, winner_ids)
+    loser_idx = np.searchsorted(team_ids, loser_ids)
+
+    # wins on each date, shifted by one so that slice k only holds games before the k-th date
+    decayed_wins = np.zeros([len(unique_days) + 1, len(team_ids), len(team_ids)])
+    np.add.at(decayed_wins, (date_codes + 1, winner_idx, loser_idx), 1.0 if weights is None else np.asarray(weights, dtype=float))
+
+    factors = np.exp(-decay * np.diff(unique_days, prepend=unique_days[:1], append=unique_days[-1:]).astype(float))
+    for k in range(1, len(decayed_wins)):
+        decayed_wins[k] += decayed_wins[k - 1]
+        decayed_wins[k] *= factors[k]
+
+    return {"dates": unique_days, "team_ids": team_ids, "cumulative_wins": decayed_wins}
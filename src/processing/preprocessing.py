@@ -1,7 +1,19 @@
 from pathlib import Path
+from functools import lru_cache
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import argparse
 import pandas as pd
 import json
 import numpy as np
+from bradley_terry import BT_SOLVER_VERSION, bt_mm_estimates, bt_mm_step, bt_mm_solve, bt_mm_solve_batch, bt_mm_solve_sparse, bt_newton_solve
+from bt_cache import get_bt_cache_key, load_bt_cache_entry, save_bt_cache_entry, prune_bt_cache, open_bt_cache
+from columnar_store import save_columnar
+from elo import compute_elo_probs
+from game_table import GameTable
+from head_to_head import build_head_to_head_index, build_decayed_head_to_head_index
+from run_report import RunReport, compare_run_reports, print_stage, time_stage
+from strength_cube import save_strength_cube
 
 
 
@@ -45,6 +57,38 @@ def is_regular(season_type: str) -> int:
 
 
 
+@lru_cache(maxsize=None)
+def load_team_abbrs(team_abbr_file: Path) -> dict[str, str]:
+    """
+    Loads the dictionary mapping normalized team names to team abbreviations. The file is only read and parsed once per path.
+
+    Args:
+        team_abbr_file (Path): Path object of file containing dictionary mapping team names to team abbreviations.
+
+    Returns:
+        dict[str, str]: Dictionary mapping normalized team names to team abbreviations.
+    """
+
+    with open(team_abbr_file, "r") as f:
+        return json.load(f)
+
+
+
+def get_all_team_abbrs(team_abbr_file: Path) -> list[str]:
+    """
+    Returns the sorted list of all distinct team abbreviations. The position of an abbreviation in this list is its integer team id.
+
+    Args:
+        team_abbr_file (Path): Path object of file containing dictionary mapping team names to team abbreviations.
+
+    Returns:
+        list[str]: Sorted list of team abbreviations.
+    """
+
+    return sorted(set(load_team_abbrs(team_abbr_file).values()))
+
+
+
 def get_team_abbr(team_name: str, team_abbr_file: Path) -> str:
     """
     Returns the team abbreviation from full team name. Default if key not found is NA.
@@ -57,8 +101,7 @@ def get_team_abbr(team_name: str, team_abbr_file: Path) -> str:
         str: String object of team abbreviation.
     """
 
-    with open(team_abbr_file, "r") as f:
-        team_abbr_dict = json.load(f)
+    team_abbr_dict = load_team_abbrs(team_abbr_file)
     key = team_name.lower().replace(" ", "_").replace(".","_").replace("__","_")
     if key not in team_abbr_dict:
         return pd.NA
@@ -219,7 +262,240 @@ def get_ml_bookmaker_profit(p_1: float, p_2: float) -> float:
 
 
 
+# column-wise formatting helper functions
+MONTH_ABBRS = {
+    "jan": "01", "feb": "02", "mar": "03", "apr": "04",
+    "may": "05", "jun": "06", "jul": "07", "aug": "08",
+    "sep": "09", "oct": "10", "nov": "11", "dec": "12"
+}
+
+
+
+def format_date_col(raw_dates: pd.Series) -> pd.Series:
+    """
+    Column-wise version of "format_date". Converts dates from "dd mon yyyy" format to "yyyy-mm-dd".
+
+    Args:
+        raw_dates (pd.Series): Series of date strings in "dd mon yyyy" format.
+
+    Returns:
+        pd.Series: Series of date strings in "yyyy-mm-dd" format.
+    """
+
+    parts = raw_dates.str.split(expand=True)
+    return parts[2] + "-" + parts[1].str.lower().map(MONTH_ABBRS) + "-" + parts[0]
+
+
+
+def get_season_col(game_urls: pd.Series) -> pd.Series:
+    """
+    Column-wise version of "get_season". Gets the season that each game was played in from its OddsPortal URL.
+
+    Args:
+        game_urls (pd.Series): Series of OddsPortal game URLs.
+
+    Returns:
+        pd.Series: Series of integer seasons (the year each season ended).
+    """
+
+    return game_urls.str.split("/").str[5].str.split("-").str[-1].astype(int)
+
+
+
+def format_points_col(points: pd.Series) -> pd.Series:
+    """
+    Column-wise version of "format_points". Intended to fail and cause error if any points value is not an integer.
+
+    Args:
+        points (pd.Series): Series of points scored.
+
+    Returns:
+        pd.Series: Series of nullable integers ("Int64") of points scored.
+    """
+
+    return points.astype("int64").astype("Int64")
+
+
+
+def get_result_col(points_1: pd.Series, points_2: pd.Series) -> pd.Series:
+    """
+    Column-wise version of "get_result". Determines the winner of each game from the points scored by the two teams.
+
+    Args:
+        points_1 (pd.Series): Series of points scored by team 1.
+        points_2 (pd.Series): Series of points scored by team 2.
+
+    Returns:
+        pd.Series: Series of nullable integers ("Int64") that are 1 if team 1 scored more points and 0 if team 2 scored more points. NA for ties or missing points.
+    """
+
+    result = pd.Series(pd.NA, index=points_1.index, dtype="Int64")
+    result[(points_1 > points_2).fillna(False).astype(bool)] = 1
+    result[(points_1 < points_2).fillna(False).astype(bool)] = 0
+    return result
+
+
+
+def parse_int_col(values: pd.Series) -> pd.Series:
+    """
+    Converts a column to integers the same way "int" converts a single value, with NA for values that cannot be converted.
+        - strings must be optionally signed base-10 integers (surrounding whitespace is allowed)
+        - floats are truncated toward zero and missing floats become NA
+
+    Args:
+        values (pd.Series): Series of strings or numbers.
+
+    Returns:
+        pd.Series: Series of floats holding the integer values, NaN where the conversion failed.
+    """
+
+    if pd.api.types.is_numeric_dtype(values):
+        return np.trunc(values.astype(float))
+
+    strs = values.astype(str).str.strip()
+    is_int = strs.str.fullmatch(r"[+-]?\d+").fillna(False).astype(bool)
+    return pd.to_numeric(strs.where(is_int), errors="coerce").astype(float)
+
+
+
+def format_ml_col(ml_1_strs: pd.Series, ml_2_strs: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Column-wise version of "format_ml". Returns integer two-way moneylines where the moneyline with the greater absolute value is 
+    the negative one, unless both moneylines are negative (dual market favorite case).
+
+    Args:
+        ml_1_strs (pd.Series): Series of moneylines of team 1.
+        ml_2_strs (pd.Series): Series of moneylines of team 2.
+
+    Returns:
+        pd.Series: Series of nullable integers ("Int64") of moneylines of team 1. NA if either of the two moneylines are not integers.
+        pd.Series: Series of nullable integers ("Int64") of moneylines of team 2. NA if either of the two moneylines are not integers.
+    """
+
+    ml_1 = parse_int_col(ml_1_strs).to_numpy()
+    ml_2 = parse_int_col(ml_2_strs).to_numpy()
+    valid = ~np.isnan(ml_1) & ~np.isnan(ml_2)
+
+    # if both are negative, this is the dual market favorite case
+    dual_favorite = (ml_1 < 0) & (ml_2 < 0)
+
+    # otherwise, ensure that the moneyline with greater absolute value is the negative one
+    first_favorite = np.abs(ml_1) > np.abs(ml_2)
+    new_ml_1 = np.where(dual_favorite, ml_1, np.where(first_favorite, -np.abs(ml_1), np.abs(ml_1)))
+    new_ml_2 = np.where(dual_favorite, ml_2, np.where(first_favorite, np.abs(ml_2), -np.abs(ml_2)))
+
+    new_ml_1 = pd.Series(np.where(valid, new_ml_1, np.nan), index=ml_1_strs.index).astype("Int64")
+    new_ml_2 = pd.Series(np.where(valid, new_ml_2, np.nan), index=ml_2_strs.index).astype("Int64")
+    return new_ml_1, new_ml_2
+
+
+
+def get_team_abbr_col(team_names: pd.Series, team_abbr_file: Path) -> pd.Series:
+    """
+    Column-wise version of "get_team_abbr". The names are normalized in bulk, once per distinct name.
+
+    Args:
+        team_names (pd.Series): Series of full team names.
+        team_abbr_file (Path): Path object of file containing dictionary mapping team names to team abbreviations.
+
+    Returns:
+        pd.Series: Series of team abbreviations, NA where the team name is not in the dictionary.
+    """
+
+    team_abbr_dict = load_team_abbrs(team_abbr_file)
+
+    names = pd.Series(team_names.dropna().unique())
+    keys = names.str.lower().str.replace(" ", "_", regex=False).str.replace(".", "_", regex=False).str.replace("__", "_", regex=False)
+    name_to_abbr = dict(zip(names, keys.map(team_abbr_dict)))
+
+    return team_names.map(name_to_abbr).astype(object).where(lambda abbrs: abbrs.notna(), pd.NA)
+
+
+
+def get_team_id_col(team_abbrs: pd.Series, team_abbr_file: Path) -> pd.Series:
+    """
+    Maps team abbreviations to integer team ids. The ids are the positions of the abbreviations in the sorted list of all 
+    abbreviations of the dictionary, so they are stable across leagues and runs and sort in the same order as the abbreviations.
+
+    Args:
+        team_abbrs (pd.Series): Series of team abbreviations.
+        team_abbr_file (Path): Path object of file containing dictionary mapping team names to team abbreviations.
+
+    Returns:
+        pd.Series: Series of integer team ids, -1 where the abbreviation is missing.
+    """
+
+    return pd.Series(pd.Categorical(team_abbrs, categories=get_all_team_abbrs(team_abbr_file)).codes, index=team_abbrs.index)
+
+
+
+def get_implied_prob_col(mls: pd.Series) -> pd.Series:
+    """
+    Column-wise version of "get_implied_prob". Converts moneylines to implied probabilities.
+
+    Args:
+        mls (pd.Series): Series of nullable integer moneylines.
+
+    Returns:
+        pd.Series: Series of implied probabilities, NaN where the moneyline is missing.
+    """
+
+    ml = mls.astype(float).to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        probs = np.where(ml < 0, np.abs(ml) / (np.abs(ml) + 100), 100 / (ml + 100))
+    return pd.Series(probs, index=mls.index)
+
+
+
+def get_ml_prob_col(p_1: pd.Series, p_2: pd.Series) -> pd.Series:
+    """
+    Column-wise version of "get_ml_prob". Returns normalized probabilities of team 1 winning given implied probabilities from two-way moneylines.
+
+    Args:
+        p_1 (pd.Series): Series of implied probabilities that team 1 wins.
+        p_2 (pd.Series): Series of implied probabilities that team 2 wins.
+
+    Returns:
+        pd.Series: Series of normalized probabilities that team 1 wins, NaN where either probability is missing.
+    """
+
+    return p_1 / (p_1 + p_2)
+
+
+
+def get_ml_bookmaker_profit_col(p_1: pd.Series, p_2: pd.Series) -> pd.Series:
+    """
+    Column-wise version of "get_ml_bookmaker_profit". Gets the bookmaker profits from the implied probabilities of two-way moneylines.
+
+    Args:
+        p_1 (pd.Series): Series of implied probabilities that team 1 wins.
+        p_2 (pd.Series): Series of implied probabilities that team 2 wins.
+
+    Returns:
+        pd.Series: Series of bookmaker profits, NaN where either probability is missing.
+    """
+
+    return p_1 + p_2 - 1
+
+
+
+
+
+
+
 # Bradley Terry helper functions
+# version of the saved Bradley-Terry state; increase when a change to the estimation would change saved results
+BT_MANIFEST_VERSION = 2
+
+# default Bradley-Terry solver settings
+BT_MAX_ITER = 100
+# largest tolerance whose early stops keep every prediction within 1e-9 of running all BT_MAX_ITER steps (see the processing README)
+BT_TOL = 1e-11
+BT_SOLVERS = ["mm", "newton", "sparse"]
+BT_CACHE_MAX_BYTES = 64 * 2 ** 20
+
+
+
 def bt_get_estimate(i: int, p: pd.Series, df: pd.DataFrame) -> float:
     """
     Compute the Bradley–Terry updated strength estimate for a single item.
@@ -238,14 +514,7 @@ def bt_get_estimate(i: int, p: pd.Series, df: pd.DataFrame) -> float:
     Returns:
         float: The updated Bradley Terry strength estimate for item i.
     """
-    get_prob = lambda i, j: np.nan if i == j else p.iloc[i] + p.iloc[j]
-    n = df.iloc[i].sum()
-
-    d_n = df.iloc[i] + df.iloc[:, i]
-    d_d = pd.Series([get_prob(i, j) for j in range(len(p))], index=p.index)
-    d = (d_n / d_d).sum()
-
-    return n / d
+    return bt_mm_estimates(p.to_numpy(dtype=float), df.to_numpy(dtype=float))[i]
 
 
 
@@ -260,7 +529,7 @@ def bt_estimate_p(p: pd.Series, df: pd.DataFrame) -> pd.Series:
     Returns:
         pd.Series: A new Series of updated Bradley Terry strength estimates.
     """
-    return pd.Series([bt_get_estimate(i, p, df) for i in range(df.shape[0])], index=p.index)
+    return pd.Series(bt_mm_estimates(p.to_numpy(dtype=float), df.to_numpy(dtype=float)), index=p.index)
 
 
 
@@ -281,11 +550,11 @@ def bt_iterate(df: pd.DataFrame, p: pd.Series = None, n: int = 100, sorted: bool
     if p is None:
         p = pd.Series([1 for _ in range(df.shape[0])], index=list(df.columns))
 
+    wins = df.to_numpy(dtype=float)
     estimates = [p]
 
     for _ in range(n):
-        p = bt_estimate_p(p, df)
-        p = p / p.sum()
+        p = pd.Series(bt_mm_step(p.to_numpy(dtype=float), wins), index=p.index)
         estimates.append(p)
 
     p = p.sort_values(ascending=False) if sorted else p
@@ -348,14 +617,329 @@ def get_loser(row: pd.Series) -> str:
 
 
 
-# main processing function
-def preprocess_league_games(raw_data_file: Path, team_abbr_file: Path, output_save_file: Path) -> None:
+def hash_date_games(home_ids: np.ndarray, away_ids: np.ndarray, results: np.ndarray) -> str:
     """
-    Preproccesses all games for league and saves to CSV file by adding 
+    Hashes the games played on one date. The hash only depends on the set of (home team, away team, result) triples, not on their order.
+
+    Args:
+        home_ids (np.ndarray): Integer team ids of the home teams.
+        away_ids (np.ndarray): Integer team ids of the away teams.
+        results (np.ndarray): 1/0 results of the games (1 if the home team won).
+
+    Returns:
+        str: Hex digest of the games.
+    """
+
+    games = np.stack([home_ids, away_ids, results], axis=1).astype(np.int64)
+    games = games[np.lexsort(games.T[::-1])]
+    return hashlib.sha1(games.tobytes()).hexdigest()
+
+
+
+def get_eval_mask(df: pd.DataFrame, eval_subset: str) -> np.ndarray:
+    """
+    Returns which games Bradley-Terry predictions are computed for. All analyses only evaluate second-half games.
+
+    Args:
+        df (pd.DataFrame): DataFrame of clean games.
+        eval_subset (str): String object of evaluation subset, "all" or "second_half".
+
+    Returns:
+        np.ndarray: Boolean array that is True for games that are evaluated.
+    """
+
+    if eval_subset == "all":
+        return np.ones(len(df), dtype=bool)
+    if eval_subset == "second_half":
+        return df["second_half"].to_numpy() == 1
+    raise ValueError(f"Unknown evaluation subset: {eval_subset}")
+
+
+
+def get_team_labels(season_df: pd.DataFrame, team_ids: np.ndarray) -> np.ndarray:
+    """
+    Returns a label for every team of a season: its abbreviation if the "HomeTeam" and "AwayTeam" columns exist, otherwise its id.
+
+    Args:
+        season_df (pd.DataFrame): DataFrame of clean games from one season.
+        team_ids (np.ndarray): Team ids of the season.
+
+    Returns:
+        np.ndarray: Labels of the teams in the order of `team_ids`.
+    """
+
+    if "HomeTeam" not in season_df or "AwayTeam" not in season_df:
+        return team_ids.astype(str)
+
+    names = pd.Series(
+        np.concatenate([season_df["HomeTeam"].to_numpy(dtype=str), season_df["AwayTeam"].to_numpy(dtype=str)]),
+        index=np.concatenate([season_df["home_id"].to_numpy(), season_df["away_id"].to_numpy()])
+    )
+    return names[~names.index.duplicated()].reindex(team_ids).to_numpy(dtype=str)
+
+
+
+def build_season_win_matrices(season_df: pd.DataFrame, decay: float = None, home_advantage: bool = False) -> dict:
+    """
+    Builds the win matrices of a season that the Bradley-Terry estimates of each date are solved from.
+
+    Args:
+        season_df (pd.DataFrame): DataFrame of clean games from one season with "Date", "home_id", "away_id", and "result" columns.
+        decay (float, optional): Decay rate per day of the weight of past games (see "build_decayed_head_to_head_index"). Defaults to None.
+        home_advantage (bool, optional): If True, also builds the matrices of home wins needed for a home advantage factor. Defaults to False.
+
+    Returns:
+        dict: Dictionary of (dates x teams x teams) arrays of the matrices before each distinct date, with rows and columns in the order of the sorted team ids of the season
+            - "cumulative_wins": unweighted win counts, which decide the teams that have played before each date
+            - "solve_wins": win counts the strengths are solved from, weighted if `decay` is given
+            - "home_wins": (weighted) home team wins, or None without `home_advantage`.
+    """
+
+    dates = season_df["Date"].to_numpy(dtype=str)
+    days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+    home_ids = season_df["home_id"].to_numpy()
+    away_ids = season_df["away_id"].to_numpy()
+    home_won = season_df["result"].to_numpy(dtype=int) == 1
+    winner_ids = np.where(home_won, home_ids, away_ids)
+    loser_ids = np.where(home_won, away_ids, home_ids)
+
+    cumulative_wins = build_head_to_head_index(dates, winner_ids, loser_ids)["cumulative_wins"][:-1]
+    solve_wins = cumulative_wins
+    if decay is not None:
+        solve_wins = build_decayed_head_to_head_index(days, winner_ids, loser_ids, decay)["cumulative_wins"][:-1]
+
+    home_wins = None
+    if home_advantage:
+        if decay is None:
+            home_wins = build_head_to_head_index(dates, home_ids, away_ids, weights=home_won)["cumulative_wins"][:-1]
+        else:
+            home_wins = build_decayed_head_to_head_index(days, home_ids, away_ids, decay, weights=home_won)["cumulative_wins"][:-1]
+
+    return {"cumulative_wins": cumulative_wins, "solve_wins": solve_wins, "home_wins": home_wins}
+
+
+
+def compute_season_bt_probs(season_df: pd.DataFrame, max_iter: int = BT_MAX_ITER, tol: float = BT_TOL, saved_state: dict = None, batched: bool = True, eval_subset: str = "all",
+                            solver: str = "mm", l2: float = 0.0, home_advantage: bool = False, cache_dir: Path = None,
+                            decay: float = None, win_matrices: dict = None) -> tuple[pd.Series, int, dict]:
+    """
+    Computes Bradley-Terry based probabilistic predictions for every game of a single season.
+
+    Strengths are estimated once per distinct date from the cumulative win-count matrix of the games played strictly before that 
+    date (see "build_head_to_head_index"), and the estimate is shared by every game on that date. Only teams that have already 
+    played are included in each estimate, which gives the same result as rebuilding the win matrix from all previous games of the 
+    season. By default the estimates of all dates are independent and are solved together with "bt_mm_solve_batch", and the 
+    predictions of all games are then gathered from the (dates x teams) strength matrix in one indexing step.
+
+    With `eval_subset="second_half"`, strengths are only estimated for dates with second-half games and all other games get NA.
+    The skipped games still count towards the win matrices of later dates.
+
+    With `solver="newton"`, all dates are solved at once with "bt_newton_solve" instead, which needs far fewer iterations and 
+    supports an L2 penalty (`l2`) and a shared home advantage factor (`home_advantage`), estimated separately for every date 
+    from the same previous games. The home team then wins with probability p_home * h / (p_home * h + p_away).
+
+    With `solver="sparse"`, no teams x teams matrices are built. The games are sorted by date, each date is solved on the list 
+    of all earlier games with "bt_mm_solve_sparse", and each MM update costs O(games) instead of O(teams²). The predictions 
+    are the same as with "mm" up to rounding, and this is the solver to use for leagues with hundreds of teams (e.g. college sports).
+
+    With `decay`, a game played `age` days before a date only counts as exp(-decay * age) wins on that date, so recent games 
+    weigh more. The decayed win matrices are updated incrementally from date to date (see "build_decayed_head_to_head_index").
+
+    The win matrices can also be built once with "build_season_win_matrices" and passed in as `win_matrices`, so that several 
+    settings (e.g. different L2 penalties) can be evaluated on the same season without rebuilding them.
+
+    The strengths of every date are returned together with a hash of each date's games. When that state from a previous run 
+    is passed back in, the strengths are reused for every date up to the first date whose games (or any earlier date's games) 
+    changed, so only the changed and new dates are solved again. Reused dates that the previous run did not evaluate have no 
+    saved strengths and are solved as well.
+
+    With `cache_dir`, the strengths of every date are also looked up in (and saved to) an on-disk cache keyed by the content of 
+    that date's win matrix, the team abbreviations, and the solver settings (see "bt_cache.py"), so unchanged win matrices are 
+    not solved again even if earlier dates changed. Time-decayed estimates are not cached.
+
+    Args:
+        season_df (pd.DataFrame): DataFrame of clean games from one season with "Date", "home_id", "away_id", and "result" columns.
+        max_iter (int, optional): Maximum number of Bradley-Terry iteration steps per estimate. Defaults to 100.
+        tol (float, optional): Convergence tolerance passed to "bt_mm_solve". If None, exactly `max_iter` steps are performed. Defaults to 1e-11,
+            which keeps the predictions within 1e-9 of running all `max_iter` steps. Dates without a finite estimate (e.g. with a winless team) always run to `max_iter`.
+        saved_state (dict, optional): State returned by a previous call for the same season and settings. Defaults to None.
+        batched (bool, optional): If True, all dates are solved at once. Otherwise they are solved one after another. Defaults to True.
+        eval_subset (str, optional): Games to compute predictions for, "all" or "second_half" (requires a "second_half" column). Defaults to "all".
+        solver (str, optional): Bradley-Terry solver, "mm", "newton", or "sparse". Defaults to "mm".
+        l2 (float, optional): L2 penalty of the "newton" solver. Defaults to 0.0.
+        home_advantage (bool, optional): If True, the "newton" solver also estimates a home advantage factor. Defaults to False.
+        cache_dir (Path, optional): Path object of the cache folder returned by "open_bt_cache". If None, no cache is used. Defaults to None.
+        decay (float, optional): Decay rate per day of the weight of past games. If None, all past games of the season count fully. Defaults to None.
+        win_matrices (dict, optional): Win matrices returned by "build_season_win_matrices" for the same season, `decay`, and home advantage. 
+            If None, they are built from `season_df`. Defaults to None.
+
+    Returns:
+        pd.Series: Probability that the home team wins for each game, indexed like `season_df`. NA if either team has not played yet.
+        int: Total number of Bradley-Terry iteration steps performed for the season.
+        dict: State of the season with keys "dates", "date_hashes", "team_ids", "strengths" (dates x teams, NaN for teams that have not played yet), 
+            and "home_advantage" (home advantage factor of each date, 1 without home advantage).
+    """
+
+    if solver not in BT_SOLVERS:
+        raise ValueError(f"Unknown Bradley-Terry solver: {solver}")
+    if solver != "newton" and (l2 != 0 or home_advantage):
+        raise ValueError("L2 penalty and home advantage require the newton solver")
+
+    home_ids = season_df["home_id"].to_numpy()
+    away_ids = season_df["away_id"].to_numpy()
+    home_won = season_df["result"].to_numpy(dtype=int) == 1
+    winner_ids = np.where(home_won, home_ids, away_ids)
+    loser_ids = np.where(home_won, away_ids, home_ids)
+
+    days = np.asarray(season_df["Date"].to_numpy(dtype=str), dtype="datetime64[D]").astype(np.int64)
+
+    # cumulative (or time-decayed) win matrices before each date
+    if solver != "sparse" or home_advantage:
+        if win_matrices is None:
+            win_matrices = build_season_win_matrices(season_df, decay=decay, home_advantage=home_advantage)
+        solve_wins = win_matrices["solve_wins"]
+        home_wins = win_matrices["home_wins"]
+
+    # map the league-wide team ids to positions within the season
+    team_ids = np.unique(np.concatenate([home_ids, away_ids]))
+    home_idx = np.searchsorted(team_ids, home_ids)
+    away_idx = np.searchsorted(team_ids, away_ids)
+
+    # positions of the games of each distinct date, in date order
+    dates, date_codes = np.unique(season_df["Date"].to_numpy(dtype=str), return_inverse=True)
+    date_games = np.split(np.argsort(date_codes, kind="stable"), np.cumsum(np.bincount(date_codes))[:-1])
+
+    # reuse saved strengths for all dates before the first changed date
+    results = home_won.astype(int)
+    date_hashes = np.array([hash_date_games(home_ids[games], away_ids[games], results[games]) for games in date_games])
+    n_teams = len(team_ids)
+    strengths = np.full([len(dates), n_teams], np.nan)
+    home_factors = np.ones(len(dates))
+
+    n_reused = 0
+    if saved_state is not None:
+        n_common = min(len(dates), len(saved_state["dates"]))
+        unchanged = (
+            (dates[:n_common] == saved_state["dates"][:n_common]) &
+            (date_hashes[:n_common] == saved_state["date_hashes"][:n_common])
+        )
+        n_reused = n_common if unchanged.all() else int(np.argmin(unchanged))
+
+        saved_team_ids = saved_state["team_ids"]
+        in_season = np.isin(saved_team_ids, team_ids)
+        strengths[:n_reused, np.searchsorted(team_ids, saved_team_ids[in_season])] = saved_state["strengths"][:n_reused, in_season]
+        home_factors[:n_reused] = saved_state["home_advantage"][:n_reused]
+
+    # which teams have played before each date
+    if solver == "sparse":
+        first_date = np.full(n_teams, len(dates))
+        np.minimum.at(first_date, home_idx, date_codes)
+        np.minimum.at(first_date, away_idx, date_codes)
+        played = np.arange(len(dates))[:, None] > first_date[None, :]
+    else:
+        cumulative_wins = win_matrices["cumulative_wins"]
+        played = (cumulative_wins.sum(axis=2) + cumulative_wins.sum(axis=1)) > 0
+    unsolved = np.flatnonzero(played.any(axis=1))
+
+    # reused dates are only solved again if the saved run did not evaluate them (e.g. the second half now starts earlier)
+    unsolved = unsolved[(unsolved >= n_reused) | ~np.isfinite(strengths[unsolved]).any(axis=1)]
+
+    # only solve dates with games that are evaluated
+    evaluated = get_eval_mask(season_df, eval_subset)
+    unsolved = np.intersect1d(unsolved, date_codes[evaluated])
+    total_iterations = 0
+
+    # games in date order, so the games before each date are a prefix
+    order = np.argsort(date_codes, kind="stable")
+    winner_idx = np.searchsorted(team_ids, winner_ids)[order]
+    loser_idx = np.searchsorted(team_ids, loser_ids)[order]
+    n_before = np.searchsorted(date_codes[order], np.arange(len(dates)))
+
+    # look up the remaining dates in the cache
+    use_cache = cache_dir is not None and decay is None
+    if use_cache:
+        cache_settings = {"version": BT_SOLVER_VERSION, "solver": solver, "max_iter": max_iter, "tol": tol, "l2": l2, "home_advantage": home_advantage}
+        labels = get_team_labels(season_df, team_ids)
+        home_win_idx = np.stack([home_idx, away_idx])[:, order][:, home_won[order]]
+        n_home_before = np.cumsum(np.concatenate([[0], home_won[order]]))[n_before]
+
+        cache_keys = {}
+        cached = np.zeros(len(dates), dtype=bool)
+        for k in unsolved:
+            past_idx = np.flatnonzero(played[k])
+            position = np.full(n_teams, -1)
+            position[past_idx] = np.arange(len(past_idx))
+
+            wins = (position[winner_idx[:n_before[k]]], position[loser_idx[:n_before[k]]])
+            home_win_pairs = tuple(position[home_win_idx[:, :n_home_before[k]]]) if home_advantage else None
+            cache_keys[k] = get_bt_cache_key(labels[past_idx], wins, cache_settings, home_wins=home_win_pairs)
+
+            values = load_bt_cache_entry(cache_dir, cache_keys[k])
+            if values is not None:
+                home_factors[k] = values[0]
+                strengths[k, past_idx[np.argsort(labels[past_idx])]] = values[1:]
+                cached[k] = True
+        unsolved = unsolved[~cached[unsolved]]
+
+    if solver == "newton":
+        # solve all remaining dates at once with Newton steps
+        strengths[unsolved], home_factors[unsolved], n_iterations = bt_newton_solve(
+            solve_wins[unsolved], 
+            home_wins=home_wins[unsolved] if home_advantage else None, 
+            l2=l2, max_iter=max_iter, tol=tol
+        )
+        total_iterations += int(n_iterations.sum())
+
+    elif solver == "sparse":
+        date_days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+        for k in unsolved:
+            counts = None
+            if decay is not None:
+                counts = np.exp(-decay * (date_days[k] - days[order][:n_before[k]]))
+
+            strengths[k], n_iterations = bt_mm_solve_sparse(winner_idx[:n_before[k]], loser_idx[:n_before[k]], n_teams, counts=counts, max_iter=max_iter, tol=tol)
+            total_iterations += n_iterations
+
+    elif batched:
+        # solve all remaining dates at once
+        strengths[unsolved], n_iterations = bt_mm_solve_batch(solve_wins[unsolved], max_iter=max_iter, tol=tol)
+        total_iterations += int(n_iterations.sum())
+
+    else:
+        for k in unsolved:
+            past_idx = np.flatnonzero(played[k])
+            strengths[k, past_idx], n_iterations = bt_mm_solve(solve_wins[k][np.ix_(past_idx, past_idx)], max_iter=max_iter, tol=tol)
+            total_iterations += n_iterations
+
+    if use_cache:
+        for k in unsolved:
+            past_idx = np.flatnonzero(played[k])
+            save_bt_cache_entry(cache_dir, cache_keys[k], np.concatenate([[home_factors[k]], strengths[k, past_idx[np.argsort(labels[past_idx])]]]))
+
+    # probability from the strengths of both teams on the date of each game, with the home advantage (NaN if either team has not played yet)
+    p_home = strengths[date_codes, home_idx] * home_factors[date_codes]
+    p_away = strengths[date_codes, away_idx]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bt_probs = np.where(evaluated & (p_home + p_away != 0), p_home / (p_home + p_away), np.nan)
+
+    bt_probs = pd.Series(bt_probs, index=season_df.index)
+    state = {"dates": dates, "date_hashes": date_hashes, "team_ids": team_ids, "strengths": strengths, "home_advantage": home_factors}
+    return bt_probs, total_iterations, state
+
+
+
+
+
+
+
+# main processing functions
+def clean_league_games(league: str, raw_data_file: Path, team_abbr_file: Path, report: RunReport = None) -> pd.DataFrame:
+    """
+    Cleans all raw games for league by adding 
     - result of game
     - moneyline based probabilistic predictions
-    - Bradley-Terry based probabilistic predictions
-    - bookmaker profit.
+    - bookmaker profit
+    - whether the game is in the second half of its season.
 
     Excludes 
     - non-regular season games
@@ -364,136 +948,265 @@ def preprocess_league_games(raw_data_file: Path, team_abbr_file: Path, output_sa
     - games with invalid moneyline data.
 
     Args:
+        league (str): String object of league abbreviation (e.g. "nfl").
         raw_data_file (Path): Path object of league's raw game data.
         team_abbr_file (Path): Path object of file containing dictionary mapping team names to team abbreviations.
-        output_save_file (Path): Path object of file where preprocessed data will be saved.
+        report (RunReport, optional): Run report that the "parse", "filter", and "split" stages are timed with. Defaults to None.
 
     Returns:
-        None
+        pd.DataFrame: DataFrame of clean games sorted by season and date (latest first), with integer "home_id" and "away_id" team id columns.
     """
 
-    # load raw game dataframe
-    raw_df = pd.read_csv(raw_data_file)
-
-    # reformat some of the raw data
-    new_df = pd.DataFrame({
-        "Date": raw_df["date"].apply(format_date),
-        "Season": raw_df["game_url"].apply(get_season),
-        "regular": raw_df["season_type"].apply(is_regular),
-        "HomeTeam": raw_df["team_1"].apply(lambda x: get_team_abbr(x, team_abbr_file)),
-        "AwayTeam": raw_df["team_2"].apply(lambda x: get_team_abbr(x, team_abbr_file)),
-        "FTHG": raw_df["points_1"].apply(format_points).astype("Int64"),
-        "FTAG": raw_df["points_2"].apply(format_points).astype("Int64"),
-        "neutral": raw_df["neutral"],
-        "game_url": raw_df["game_url"]
-    })
-
-    # throw out all non regular season games
-    new_df = new_df[new_df["regular"] == 1]
-
-
-    # determine result of game
-    new_df["result"] = new_df.apply(
-        lambda row: get_result(row["FTHG"], row["FTAG"]),
-        axis=1
-    ).astype("Int64")
-
-    # calculate moneyline probabilistic prediction based on home away moneylines
-    new_df[["home_ml", "away_ml"]] = raw_df.apply(
-        lambda row: format_ml(row["moneyline_1"], row["moneyline_2"]),
-        axis=1,
-        result_type="expand"
-    ).astype("Int64")
-    new_df["implied_ml_1"] = new_df["home_ml"].apply(get_implied_prob)
-    new_df["implied_ml_2"] = new_df["away_ml"].apply(get_implied_prob)
-    new_df["bookmaker_profit"] = new_df.apply(lambda row: get_ml_bookmaker_profit(row["implied_ml_1"], row["implied_ml_2"]), axis=1)
-    new_df["ml_prob"] = new_df.apply(lambda row: get_ml_prob(row["implied_ml_1"], row["implied_ml_2"]), axis=1)
+    with time_stage(report, "parse", league=league) as stage:
+        # load raw game dataframe
+        raw_df = pd.read_csv(raw_data_file)
+        stage["rows"] = len(raw_df)
+
+        # reformat some of the raw data
+        new_df = pd.DataFrame({
+            "Date": format_date_col(raw_df["date"]),
+            "Season": get_season_col(raw_df["game_url"]),
+            "regular": (raw_df["season_type"] == "Regular").astype(int),
+            "HomeTeam": get_team_abbr_col(raw_df["team_1"], team_abbr_file),
+            "AwayTeam": get_team_abbr_col(raw_df["team_2"], team_abbr_file),
+            "FTHG": format_points_col(raw_df["points_1"]),
+            "FTAG": format_points_col(raw_df["points_2"]),
+            "neutral": raw_df["neutral"],
+            "game_url": raw_df["game_url"]
+        })
+
+        # calculate moneylines and implied probabilities before filtering, as the raw rows are aligned by index
+        new_df["home_ml"], new_df["away_ml"] = format_ml_col(raw_df["moneyline_1"], raw_df["moneyline_2"])
+
+    with time_stage(report, "filter", league=league) as stage:
+        # throw out all non regular season games
+        new_df = new_df[new_df["regular"] == 1].copy()
+        stage["rows"] = len(new_df)
+
+
+        # determine result of game
+        new_df["result"] = get_result_col(new_df["FTHG"], new_df["FTAG"])
+
+        # calculate moneyline probabilistic prediction based on home away moneylines
+        new_df["implied_ml_1"] = get_implied_prob_col(new_df["home_ml"])
+        new_df["implied_ml_2"] = get_implied_prob_col(new_df["away_ml"])
+        new_df["bookmaker_profit"] = get_ml_bookmaker_profit_col(new_df["implied_ml_1"], new_df["implied_ml_2"])
+        new_df["ml_prob"] = get_ml_prob_col(new_df["implied_ml_1"], new_df["implied_ml_2"])
     
 
 
 
-    # compute number of invalid games and their reasons and print out the statistics
-    total_regular_len = len(new_df)
-    neutrals_len = len(new_df[new_df["neutral"] == 1])
-    ties_len = len(new_df[new_df["result"].isna()])
-    na_team_len = len(new_df[(new_df["HomeTeam"].isna()) | (new_df["AwayTeam"].isna())])
-    missing_ml_len = len(new_df[(new_df["ml_prob"].isna())])
-    # exclude invalid games from final result
-    mask = (
-        (new_df["neutral"] == 0) &
-        (new_df["result"].notna()) &
-        (new_df["HomeTeam"].notna()) &
-        (new_df["AwayTeam"].notna()) &
-        (new_df["ml_prob"].notna())
-    )
-    clean_df = new_df[mask].copy()
+        # compute number of invalid games and their reasons and print out the statistics
+        total_regular_len = len(new_df)
+        neutrals_len = len(new_df[new_df["neutral"] == 1])
+        ties_len = len(new_df[new_df["result"].isna()])
+        na_team_len = len(new_df[(new_df["HomeTeam"].isna()) | (new_df["AwayTeam"].isna())])
+        missing_ml_len = len(new_df[(new_df["ml_prob"].isna())])
+        # exclude invalid games from final result
+        mask = (
+            (new_df["neutral"] == 0) &
+            (new_df["result"].notna()) &
+            (new_df["HomeTeam"].notna()) &
+            (new_df["AwayTeam"].notna()) &
+            (new_df["ml_prob"].notna())
+        )
+        clean_df = new_df[mask].copy()
+
+        print(f"- {league.upper()}:")
+        print(f"    - Total regular season games: {total_regular_len}.")
+        print(f"    - Regular season games at neutral venue: {neutrals_len} ({100 * neutrals_len / total_regular_len:.2f}%).")
+        print(f"    - Regular season games ending in ties: {ties_len} ({100 * ties_len / total_regular_len:.2f}%).")
+        print(f"    - Regular season games with unrecognized teams: {na_team_len} ({100 * na_team_len / total_regular_len:.2f}%).")
+        print(f"    - Regular season games with invalid moneyline data: {missing_ml_len} ({100 * missing_ml_len / total_regular_len:.2f}%).")
+        print(f"    - Clean regular season games: {len(clean_df)} ({100 * len(clean_df) / total_regular_len:.2f}%).")
+
+        # summarize the team names that could not be mapped to an abbreviation
+        unmapped_names = pd.concat([
+            raw_df.loc[new_df.index[new_df["HomeTeam"].isna()], "team_1"],
+            raw_df.loc[new_df.index[new_df["AwayTeam"].isna()], "team_2"]
+        ]).value_counts()
+        if not unmapped_names.empty:
+            print(f"    - Unrecognized team names: {', '.join(f'{name} ({count})' for name, count in unmapped_names.items())}.")
+
+
+
+
+    with time_stage(report, "split", league=league) as stage:
+        stage["rows"] = len(clean_df)
+
+        # determine which games occur in second half of regular season for each season
+        clean_df = clean_df.sort_values(by=["Season", "Date"], ascending=[False, False])
+        season_counts = clean_df.groupby("Season")["Date"].transform("count")
+        reverse_rank = clean_df.groupby("Season").cumcount()
+        clean_df["second_half"] = (reverse_rank < (season_counts / 2)).astype(int)
+        clean_df = clean_df.reset_index(drop=True)
+
+        # integer team ids for the Bradley-Terry win matrices
+        clean_df["home_id"] = get_team_id_col(clean_df["HomeTeam"], team_abbr_file)
+        clean_df["away_id"] = get_team_id_col(clean_df["AwayTeam"], team_abbr_file)
+
+    return clean_df
+
+
+
+def get_bt_settings(team_abbr_file: Path, bt_eval_subset: str, bt_solver: str, bt_l2: float, bt_home_advantage: bool) -> dict:
+    """
+    Returns the settings that Bradley-Terry results depend on. Saved results are only reused if these settings are unchanged.
+
+    Args:
+        team_abbr_file (Path): Path object of file containing dictionary mapping team names to team abbreviations.
+        bt_eval_subset (str): String object of the games Bradley-Terry predictions are computed for, "all" or "second_half".
+        bt_solver (str): String object of the Bradley-Terry solver, "mm", "newton", or "sparse".
+        bt_l2 (float): L2 penalty of the newton solver.
+        bt_home_advantage (bool): Whether the newton solver estimates a home advantage factor.
+
+    Returns:
+        dict: Dictionary of settings.
+    """
+
+    all_abbrs = get_all_team_abbrs(team_abbr_file)
+    return {
+        "version": BT_MANIFEST_VERSION,
+        "solver_version": BT_SOLVER_VERSION,
+        "max_iter": BT_MAX_ITER,
+        "tol": BT_TOL,
+        "eval_subset": bt_eval_subset,
+        "solver": bt_solver,
+        "l2": bt_l2,
+        "home_advantage": bt_home_advantage,
+        "team_ids": hashlib.sha1(json.dumps(all_abbrs).encode()).hexdigest()
+    }
+
+
+
+def load_bt_manifest(manifest_file: Path, settings: dict) -> dict:
+    """
+    Loads the saved Bradley-Terry state of every season of a league. Returns no state if the file does not exist or was written with different settings.
+
+    Args:
+        manifest_file (Path): Path object of the league's manifest file.
+        settings (dict): Settings returned by "get_bt_settings".
+
+    Returns:
+        dict: Dictionary mapping season to the state returned by "compute_season_bt_probs".
+    """
+
+    if not manifest_file.exists():
+        return {}
+
+    with np.load(manifest_file) as manifest:
+        if str(manifest["settings"]) != json.dumps(settings, sort_keys=True):
+            return {}
+        return {
+            int(season): {key: manifest[f"{season}_{key}"] for key in ["dates", "date_hashes", "team_ids", "strengths", "home_advantage"]}
+            for season in manifest["seasons"]
+        }
 
-    print(f"- {league.upper()}:")
-    print(f"    - Total regular season games: {total_regular_len}.")
-    print(f"    - Regular season games at neutral venue: {neutrals_len} ({100 * neutrals_len / total_regular_len:.2f}%).")
-    print(f"    - Regular season games ending in ties: {ties_len} ({100 * ties_len / total_regular_len:.2f}%).")
-    print(f"    - Regular season games with unrecognized teams: {na_team_len} ({100 * na_team_len / total_regular_len:.2f}%).")
-    print(f"    - Regular season games with invalid moneyline data: {missing_ml_len} ({100 * missing_ml_len / total_regular_len:.2f}%).")
-    print(f"    - Clean regular season games: {len(clean_df)} ({100 * len(clean_df) / total_regular_len:.2f}%).")
 
 
+def save_bt_manifest(manifest_file: Path, settings: dict, season_states: dict) -> None:
+    """
+    Saves the Bradley-Terry state of every season of a league so that a later run only needs to solve changed or new dates.
+
+    Args:
+        manifest_file (Path): Path object of the league's manifest file.
+        settings (dict): Settings returned by "get_bt_settings".
+        season_states (dict): Dictionary mapping season to the state returned by "compute_season_bt_probs".
+
+    Returns:
+        None
+    """
 
+    arrays = {
+        "settings": np.array(json.dumps(settings, sort_keys=True)),
+        "seasons": np.array(sorted(season_states), dtype=int)
+    }
+    for season, state in season_states.items():
+        for key, value in state.items():
+            arrays[f"{season}_{key}"] = value
 
-    # determine which games occur in second half of regular season for each season
-    clean_df = clean_df.sort_values(by=["Season", "Date"], ascending=[False, False])
-    season_counts = clean_df.groupby("Season")["Date"].transform("count")
-    reverse_rank = clean_df.groupby("Season").cumcount()
-    clean_df["second_half"] = (reverse_rank < (season_counts / 2)).astype(int)
-    clean_df = clean_df.reset_index(drop=True)
+    manifest_file.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(manifest_file, **arrays)
 
 
 
+def compute_league_bt_probs(clean_df: pd.DataFrame, saved_states: dict = None, bt_eval_subset: str = "second_half",
+                            bt_solver: str = "mm", bt_l2: float = 0.0, bt_home_advantage: bool = False, bt_cache_dir: Path = None,
+                            bt_decay: float = None) -> tuple[pd.Series, dict, int]:
+    """
+    Computes Bradley-Terry based probabilistic predictions for all clean games of a league, one season at a time.
+
+    Args:
+        clean_df (pd.DataFrame): DataFrame of clean games returned by "clean_league_games".
+        saved_states (dict, optional): Dictionary mapping season to the state saved by a previous run. Defaults to None.
+        bt_eval_subset (str, optional): Games to compute predictions for, "all" or "second_half". Other games get NA. Defaults to "second_half".
+        bt_solver (str, optional): Bradley-Terry solver, "mm", "newton", or "sparse". Defaults to "mm".
+        bt_l2 (float, optional): L2 penalty of the newton solver. Defaults to 0.0.
+        bt_home_advantage (bool, optional): If True, the newton solver also estimates a home advantage factor. Defaults to False.
+        bt_cache_dir (Path, optional): Path object of the Bradley-Terry cache folder returned by "open_bt_cache". Defaults to None.
+        bt_decay (float, optional): Decay rate per day of the weight of past games (time-decayed Bradley-Terry). Defaults to None.
+
+    Returns:
+        pd.Series: Probability that the home team wins for each game, indexed like `clean_df`.
+        dict: Dictionary mapping season to the state returned by "compute_season_bt_probs".
+        int: Total number of Bradley-Terry iteration steps performed for all seasons.
+    """
+
+    saved_states = {} if saved_states is None else saved_states
+
     # compute Bradley Terry Predictions (using code from https://datascience.oneoffcoder.com/btl-model.html)
-    clean_df['bt_prob'] = pd.NA
-    clean_df['winner'] = clean_df.apply(get_winner, axis=1)
-    clean_df['loser'] = clean_df.apply(get_loser, axis=1)
-    clean_df = clean_df.reset_index(drop=True)
+    bt_probs = []
+    season_states = {}
+    total_iterations = 0
+    for season, season_df in clean_df.groupby("Season"):
+        season_bt_probs, n_iterations, season_states[season] = compute_season_bt_probs(season_df, saved_state=saved_states.get(season), eval_subset=bt_eval_subset,
+                                                                                   solver=bt_solver, l2=bt_l2, home_advantage=bt_home_advantage, cache_dir=bt_cache_dir, decay=bt_decay)
+        model = "Bradley-Terry" if bt_decay is None else "time-decayed Bradley-Terry"
+        print(f"    - Season {season}: {season_df['Date'].nunique()} dates, {n_iterations} {model} iterations")
+        bt_probs.append(season_bt_probs)
+        total_iterations += n_iterations
 
-    
-    for index, row in clean_df.iterrows():
-        if index % 100 == 0:
-            print(f"{index} / {len(clean_df)}")
-        past_games = clean_df[
-            (clean_df['Season'] == row['Season']) & 
-            (pd.to_datetime(clean_df['Date'], format="%Y-%m-%d") < pd.to_datetime(row['Date'], format="%Y-%m-%d"))
-        ]
+    return pd.concat(bt_probs).reindex(clean_df.index), season_states, total_iterations
 
-        teams = sorted(list(set(past_games.HomeTeam) | set(past_games.AwayTeam)))
-        t2i = {t: i for i, t in enumerate(teams)}
 
-        df = past_games\
-            .groupby(['winner', 'loser'])\
-            .agg('count')\
-            .drop(columns=['AwayTeam', 'FTHG', 'FTAG'])\
-            .rename(columns={'HomeTeam': 'n'})\
-            .reset_index()
-        df['r'] = df['winner'].apply(lambda t: t2i[t])
-        df['c'] = df['loser'].apply(lambda t: t2i[t])
 
-        n_teams = len(teams)
-        mat = np.zeros([n_teams, n_teams])
+def compute_league_elo_probs(clean_df: pd.DataFrame) -> pd.Series:
+    """
+    Computes Elo based probabilistic predictions for all clean games of a league with the default Elo settings (see "elo.py").
+    Ratings are carried over (and regressed to the mean) from one season to the next.
 
-        for _, r in df.iterrows():
-            mat[r.r, r.c] = r.n
+    Args:
+        clean_df (pd.DataFrame): DataFrame of clean games returned by "clean_league_games".
 
-        iterate_df = pd.DataFrame(mat, columns=teams, index=teams)
+    Returns:
+        pd.Series: Probability that the home team wins for each game, indexed like `clean_df`.
+    """
+
+    elo_probs = compute_elo_probs(
+        clean_df["Date"].to_numpy(dtype=str),
+        clean_df["Season"].to_numpy(),
+        clean_df["home_id"].to_numpy(),
+        clean_df["away_id"].to_numpy(),
+        clean_df["result"].to_numpy(dtype=float)
+    )
+    return pd.Series(elo_probs, index=clean_df.index)
 
-        # max 100 iterations
-        p, _ = bt_iterate(iterate_df, n=100)
-        home_team, away_team = row['HomeTeam'], row['AwayTeam']
 
-        if home_team in p and away_team in p:
-            if (p[home_team] + p[away_team]) != 0:
-                clean_df.at[index, 'bt_prob'] = p[home_team] / (p[home_team] + p[away_team])
-            else:
-                clean_df.at[index, 'bt_prob'] = pd.NA
 
+def save_league_games(clean_df: pd.DataFrame, output_save_file: Path, teams: list[str] = None, columnar_dir: Path = None) -> None:
+    """
+    Selects, orders, and renames the processed columns and saves them to CSV file, and optionally to a typed columnar store 
+    (see "columnar_store.py") for fast loading.
 
+    Args:
+        clean_df (pd.DataFrame): DataFrame of clean games with "bt_prob" and "elo_prob" columns, and optionally a "bt_decay_prob" column.
+        output_save_file (Path): Path object of file where preprocessed data will be saved.
+        teams (list[str], optional): List of team abbreviations that the team ids of the columnar store refer to. Required with `columnar_dir`. Defaults to None.
+        columnar_dir (Path, optional): Path object of folder where the columnar store is saved. If None, only the CSV file is saved. Defaults to None.
+
+    Returns:
+        None
+    """
 
     # save the result
     new_order = [
@@ -501,9 +1214,11 @@ def preprocess_league_games(raw_data_file: Path, team_abbr_file: Path, output_sa
         "HomeTeam", "AwayTeam", "result",
         "home_ml", "away_ml",
         "bookmaker_profit", "ml_prob",
-        "bt_prob",
+        "bt_prob", "elo_prob",
         "game_url"
     ]
+    if "bt_decay_prob" in clean_df:
+        new_order.insert(new_order.index("elo_prob"), "bt_decay_prob")
     clean_df = clean_df[new_order]
     clean_df = clean_df.rename(columns={
         "Date": "date",
@@ -513,17 +1228,237 @@ def preprocess_league_games(raw_data_file: Path, team_abbr_file: Path, output_sa
     })
     clean_df.to_csv(output_save_file, index=False)
 
+    if columnar_dir is not None:
+        save_columnar(GameTable.from_pandas(clean_df, teams), columnar_dir)
 
 
 
+def preprocess_league_games(raw_data_file: Path, team_abbr_file: Path, output_save_file: Path, league: str = None, manifest_file: Path = None, bt_eval_subset: str = "second_half",
+                            bt_solver: str = "mm", bt_l2: float = 0.0, bt_home_advantage: bool = False, 
+                            bt_cache_dir: Path = None, bt_cache_max_bytes: int = BT_CACHE_MAX_BYTES, strength_cube_file: Path = None,
+                            bt_decay: float = None, report: RunReport = None) -> None:
+    """
+    Preproccesses all games for league and saves to CSV file by adding 
+    - result of game
+    - moneyline based probabilistic predictions
+    - Bradley-Terry based probabilistic predictions (optionally also time-decayed)
+    - Elo based probabilistic predictions
+    - bookmaker profit.
 
+    Excludes 
+    - non-regular season games
+    - games at neutral venues
+    - games with ties
+    - games with invalid moneyline data.
 
+    Args:
+        raw_data_file (Path): Path object of league's raw game data.
+        team_abbr_file (Path): Path object of file containing dictionary mapping team names to team abbreviations.
+        output_save_file (Path): Path object of file where preprocessed data will be saved.
+        league (str, optional): String object of league abbreviation (e.g. "nfl"). If None, the stem of `output_save_file` is used. Defaults to None.
+        manifest_file (Path, optional): Path object of the league's manifest file. If given, the Bradley-Terry state saved there by a previous run is 
+            reused for all unchanged dates and the file is updated afterwards (incremental mode). Defaults to None.
+        bt_eval_subset (str, optional): Games to compute Bradley-Terry predictions for, "all" or "second_half". Other games get NA. Defaults to "second_half".
+        bt_solver (str, optional): Bradley-Terry solver, "mm" (MM updates), "newton" (Newton steps, see "bt_newton_solve"), or "sparse" (MM updates on the list of games, see "bt_mm_solve_sparse"). Defaults to "mm".
+        bt_l2 (float, optional): L2 penalty (pseudo-games against an average team) of the newton solver. Defaults to 0.0.
+        bt_home_advantage (bool, optional): If True, the newton solver also estimates a shared home advantage factor. Defaults to False.
+        bt_cache_dir (Path, optional): Path object of the Bradley-Terry cache folder returned by "open_bt_cache". If given, strengths of 
+            win matrices that were already solved are loaded from the cache instead of being solved again. Defaults to None.
+        bt_cache_max_bytes (int, optional): Size of the cache in bytes above which the least recently used entries are deleted. Defaults to 64 MB.
+        strength_cube_file (Path, optional): Path object of ".npy" file where the Bradley-Terry strengths of every team on every date are saved 
+            (see "save_strength_cube"). If None, the strengths are not saved. Defaults to None.
+        bt_decay (float, optional): If given, also saves time-decayed Bradley-Terry predictions to a "bt_decay_prob" column, where a game played 
+            `age` days earlier counts as exp(-bt_decay * age) wins. Defaults to None.
+        report (RunReport, optional): Run report that every stage ("parse", "filter", "split", "bt", "bt_decay", "elo", and "save") is 
+            timed with. Defaults to None.
 
-if __name__ == "__main__":
-    leagues = ["mlb", "nba", "nfl", "nhl"]
+    Returns:
+        None
+    """
+
+    league = output_save_file.stem if league is None else league
+
+    clean_df = clean_league_games(league, raw_data_file, team_abbr_file, report=report)
+
+    settings = get_bt_settings(team_abbr_file, bt_eval_subset, bt_solver, bt_l2, bt_home_advantage)
+    saved_states = load_bt_manifest(manifest_file, settings) if manifest_file is not None else {}
+
+    with time_stage(report, "bt", league=league, rows=len(clean_df)) as stage:
+        clean_df["bt_prob"], season_states, stage["iterations"] = compute_league_bt_probs(clean_df, saved_states=saved_states, bt_eval_subset=bt_eval_subset,
+                                                                                          bt_solver=bt_solver, bt_l2=bt_l2, bt_home_advantage=bt_home_advantage, bt_cache_dir=bt_cache_dir)
+    if bt_decay is not None:
+        with time_stage(report, "bt_decay", league=league, rows=len(clean_df)) as stage:
+            clean_df["bt_decay_prob"], _, stage["iterations"] = compute_league_bt_probs(clean_df, bt_eval_subset=bt_eval_subset,
+                                                                                        bt_solver=bt_solver, bt_l2=bt_l2, bt_home_advantage=bt_home_advantage, bt_decay=bt_decay)
+    with time_stage(report, "elo", league=league, rows=len(clean_df)):
+        clean_df["elo_prob"] = compute_league_elo_probs(clean_df)
+
+    with time_stage(report, "save", league=league, rows=len(clean_df)):
+        save_league_games(clean_df, output_save_file, teams=get_all_team_abbrs(team_abbr_file), columnar_dir=output_save_file.parent / "columnar" / league)
+        if manifest_file is not None:
+            save_bt_manifest(manifest_file, settings, season_states)
+        if strength_cube_file is not None:
+            save_strength_cube(season_states, get_all_team_abbrs(team_abbr_file), strength_cube_file)
+        if bt_cache_dir is not None:
+            prune_bt_cache(bt_cache_dir, bt_cache_max_bytes)
+
+
+
+def preprocess_leagues_parallel(leagues: list[str], team_abbr_file: Path, workers: int, incremental: bool = False, bt_eval_subset: str = "second_half",
+                               bt_solver: str = "mm", bt_l2: float = 0.0, bt_home_advantage: bool = False, 
+                               bt_cache_dir: Path = None, bt_cache_max_bytes: int = BT_CACHE_MAX_BYTES, strength_cubes: bool = False,
+                               bt_decay: float = None, report: RunReport = None) -> None:
+    """
+    Preprocesses several leagues at once by sharding the Bradley-Terry estimation by (league, season) across a process pool.
+
+    Bradley-Terry estimates only use games from the same season, so every season of every league is an independent task. 
+    The raw data of each league is cleaned in the main process, the seasons are solved by the workers, and the results are 
+    merged back by row index before saving, so the output does not depend on the number of workers or on task completion order.
+
+    Args:
+        leagues (list[str]): List of league abbreviations (e.g. ["nba", "nfl"]).
+        team_abbr_file (Path): Path object of file containing dictionary mapping team names to team abbreviations.
+        workers (int): Number of worker processes.
+        incremental (bool, optional): If True, reuses and updates the Bradley-Terry state saved in `processed_data/manifests/{league}.npz`. Defaults to False.
+        bt_eval_subset (str, optional): Games to compute Bradley-Terry predictions for, "all" or "second_half". Other games get NA. Defaults to "second_half".
+        bt_solver (str, optional): Bradley-Terry solver, "mm", "newton", or "sparse". Defaults to "mm".
+        bt_l2 (float, optional): L2 penalty of the newton solver. Defaults to 0.0.
+        bt_home_advantage (bool, optional): If True, the newton solver also estimates a home advantage factor. Defaults to False.
+        bt_cache_dir (Path, optional): Path object of the Bradley-Terry cache folder returned by "open_bt_cache". Defaults to None.
+        bt_cache_max_bytes (int, optional): Size of the cache in bytes above which the least recently used entries are deleted. Defaults to 64 MB.
+        strength_cubes (bool, optional): If True, saves the Bradley-Terry strengths of every team on every date to `processed_data/strengths/{league}.npy`. Defaults to False.
+        bt_decay (float, optional): If given, also saves time-decayed Bradley-Terry predictions to a "bt_decay_prob" column. Defaults to None.
+        report (RunReport, optional): Run report that the stages are timed with. The "bt" stage covers the Bradley-Terry estimates 
+            of all leagues. Defaults to None.
+
+    Returns:
+        None
+    """
+
+    settings = get_bt_settings(team_abbr_file, bt_eval_subset, bt_solver, bt_l2, bt_home_advantage)
+
+    clean_dfs = {}
+    saved_states = {}
     for league in leagues:
         print(f"----{league}----")
-        preprocess_league_games(raw_data_file=Path(f"raw_data/oddsportal_{league}.csv"), 
-                            team_abbr_file=Path("utility/team_abbrs.json"), 
-                            output_save_file=Path(f"processed_data/{league}.csv"))
-        print("-----------\n")
\ No newline at end of file
+        clean_dfs[league] = clean_league_games(league, Path(f"raw_data/oddsportal_{league}.csv"), team_abbr_file, report=report)
+        saved_states[league] = load_bt_manifest(Path(f"processed_data/manifests/{league}.npz"), settings) if incremental else {}
+        print("-----------\n")
+
+    # the seasons of all leagues are solved together, so the workers are timed as a single stage
+    season_states = {league: {} for league in leagues}
+    n_games = sum(len(clean_df) for clean_df in clean_dfs.values())
+    with time_stage(report, "bt", rows=n_games) as stage, ProcessPoolExecutor(max_workers=workers) as executor:
+
+        # submit the largest seasons first so that they do not end up as stragglers
+        tasks = [
+            (league, season, season_df)
+            for league, clean_df in clean_dfs.items()
+            for season, season_df in clean_df.groupby("Season")
+        ]
+        tasks.sort(key=lambda task: len(task[2]), reverse=True)
+        decays = [None] if bt_decay is None else [None, bt_decay]
+        futures = {
+            (league, season, decay): executor.submit(compute_season_bt_probs, season_df, saved_state=saved_states[league].get(season) if decay is None else None, 
+                                                     eval_subset=bt_eval_subset, solver=bt_solver, l2=bt_l2, home_advantage=bt_home_advantage, cache_dir=bt_cache_dir, decay=decay)
+            for league, season, season_df in tasks
+            for decay in decays
+        }
+
+        # collect the results in a fixed order
+        total_iterations = 0
+        for league, clean_df in clean_dfs.items():
+            for decay in decays:
+                bt_probs = []
+                for season in sorted(clean_df["Season"].unique()):
+                    season_bt_probs, n_iterations, state = futures[(league, season, decay)].result()
+                    model = "Bradley-Terry" if decay is None else "time-decayed Bradley-Terry"
+                    print(f"- {league.upper()} season {season}: {n_iterations} {model} iterations")
+                    bt_probs.append(season_bt_probs)
+                    total_iterations += n_iterations
+                    if decay is None:
+                        season_states[league][season] = state
+
+                clean_df["bt_prob" if decay is None else "bt_decay_prob"] = pd.concat(bt_probs).reindex(clean_df.index)
+        stage["iterations"] = total_iterations
+
+    for league, clean_df in clean_dfs.items():
+        with time_stage(report, "elo", league=league, rows=len(clean_df)):
+            clean_df["elo_prob"] = compute_league_elo_probs(clean_df)
+
+        with time_stage(report, "save", league=league, rows=len(clean_df)):
+            save_league_games(clean_df, Path(f"processed_data/{league}.csv"), teams=get_all_team_abbrs(team_abbr_file), columnar_dir=Path(f"processed_data/columnar/{league}"))
+            if incremental:
+                save_bt_manifest(Path(f"processed_data/manifests/{league}.npz"), settings, season_states[league])
+            if strength_cubes:
+                save_strength_cube(season_states[league], get_all_team_abbrs(team_abbr_file), Path(f"processed_data/strengths/{league}.npy"))
+
+    if bt_cache_dir is not None:
+        prune_bt_cache(bt_cache_dir, bt_cache_max_bytes)
+
+
+
+
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (1 processes leagues sequentially)")
+    parser.add_argument("--bt-eval", choices=["second_half", "all"], default="second_half", help="games to compute Bradley-Terry predictions for (others are left empty)")
+    parser.add_argument("--bt-solver", choices=BT_SOLVERS, default="mm", help="Bradley-Terry solver (MM updates or Newton steps)")
+    parser.add_argument("--bt-l2", type=float, default=0.0, help="L2 penalty of the newton solver (pseudo-games against an average team)")
+    parser.add_argument("--bt-home-advantage", action="store_true", help="estimate a shared home advantage factor with the newton solver")
+    parser.add_argument("--bt-cache", action="store_true", help="load and save Bradley-Terry strengths in the on-disk cache in processed_data/bt_cache")
+    parser.add_argument("--bt-cache-max-mb", type=int, default=64, help="size of the Bradley-Terry cache above which the least recently used entries are deleted")
+    parser.add_argument("--bt-decay", type=float, default=None, help="also save time-decayed Bradley-Terry predictions (bt_decay_prob) with this decay rate per day")
+    parser.add_argument("--strength-cube", action="store_true", help="save the Bradley-Terry strengths of every team on every date to processed_data/strengths")
+    parser.add_argument("--incremental", action="store_true", help="only solve Bradley-Terry estimates for dates that changed since the last incremental run")
+    parser.add_argument("--timing", action="store_true", help="print the wall time, rows per second, iterations, and peak memory of every stage")
+    parser.add_argument("--report", type=Path, default=None, help="save the stage timings of the run to this JSON file")
+    parser.add_argument("--trace-memory", action="store_true", help="measure the peak memory of every stage with tracemalloc (slower)")
+    parser.add_argument("--compare-report", type=Path, default=None, help="compare the stage timings with the JSON report of an earlier run (requires --report)")
+    args = parser.parse_args()
+    if args.compare_report is not None and args.report is None:
+        parser.error("--compare-report requires --report")
+
+    report = None
+    if args.timing or args.report is not None or args.trace_memory:
+        report = RunReport(settings={key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+                           callback=print_stage if args.timing else None, trace_memory=args.trace_memory)
+
+    leagues = ["mlb", "nba", "nfl", "nhl"]
+    bt_cache_dir = open_bt_cache(Path("processed_data/bt_cache"), BT_SOLVER_VERSION) if args.bt_cache else None
+    if args.workers > 1:
+        preprocess_leagues_parallel(leagues, team_abbr_file=Path("utility/team_abbrs.json"), workers=args.workers, incremental=args.incremental, bt_eval_subset=args.bt_eval,
+                                    bt_solver=args.bt_solver, bt_l2=args.bt_l2, bt_home_advantage=args.bt_home_advantage,
+                                    bt_cache_dir=bt_cache_dir, bt_cache_max_bytes=args.bt_cache_max_mb * 2 ** 20, strength_cubes=args.strength_cube,
+                                    bt_decay=args.bt_decay, report=report)
+    else:
+        for league in leagues:
+            print(f"----{league}----")
+            preprocess_league_games(raw_data_file=Path(f"raw_data/oddsportal_{league}.csv"), 
+                                team_abbr_file=Path("utility/team_abbrs.json"), 
+                                output_save_file=Path(f"processed_data/{league}.csv"),
+                                league=league,
+                                manifest_file=Path(f"processed_data/manifests/{league}.npz") if args.incremental else None,
+                                bt_eval_subset=args.bt_eval,
+                                bt_solver=args.bt_solver,
+                                bt_l2=args.bt_l2,
+                                bt_home_advantage=args.bt_home_advantage,
+                                bt_cache_dir=bt_cache_dir,
+                                bt_cache_max_bytes=args.bt_cache_max_mb * 2 ** 20,
+                                strength_cube_file=Path(f"processed_data/strengths/{league}.npy") if args.strength_cube else None,
+                                bt_decay=args.bt_decay,
+                                report=report)
+            print("-----------\n")
+
+    if args.report is not None:
+        report.save(args.report)
+        if args.compare_report is not None:
+            print("----stage timings compared to the earlier run----")
+            for row in compare_run_reports(args.compare_report, args.report):
+                name = row["stage"] if row["league"] is None else f"{row['league']} {row['stage']}"
+                change = "new stage" if row["ratio"] is None else f"{row['old_seconds']:.2f} s -> {row['new_seconds']:.2f} s ({row['ratio']:.2f}x)"
+                print(f"- {name}: {change}")
+            print("-----------\n")
@@ -0,0 +1,209 @@
+import contextlib
+import json
+import logging
+import resource
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+
+
+logger = logging.getLogger("preprocessing.stages")
+
+
+
+def get_peak_rss_bytes() -> int:
+    """
+    Returns the peak resident memory of the current process so far.
+
+    Returns:
+        int: Peak resident memory in bytes.
+    """
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+
+def format_stage(record: dict) -> str:
+    """
+    Formats the record of a stage as a single line, e.g. "nba parse: 0.41 s, 49,562 rows/s, 180.3 MB peak memory".
+
+    Args:
+        record (dict): Stage record created by "RunReport.stage".
+
+    Returns:
+        str: Formatted record.
+    """
+
+    name = record["stage"] if record["league"] is None else f"{record['league']} {record['stage']}"
+    parts = [f"{record['seconds']:.2f} s"]
+    if record["rows_per_second"] is not None:
+        parts.append(f"{record['rows_per_second']:,.0f} rows/s")
+    if record["iterations"] is not None:
+        parts.append(f"{record['iterations']:,} iterations")
+    parts.append(f"{record['peak_memory_mb']:.1f} MB peak memory")
+    return f"{name}: {', '.join(parts)}"
+
+
+
+def print_stage(record: dict) -> None:
+    """
+    Callback for "RunReport" that prints each stage as soon as it finishes.
+
+    Args:
+        record (dict): Stage record created by "RunReport.stage".
+
+    Returns:
+        None
+    """
+
+    print(f"    - {format_stage(record)}")
+
+
+
+@dataclass(slots=True)
+class RunReport:
+    """
+    Records the wall time, rows per second, solver iterations, and peak memory of every stage of a preprocessing run.
+
+    Each finished stage is logged to the "preprocessing.stages" logger at INFO level and passed to `callback`. Peak memory is the
+    peak of memory allocated during the stage if `trace_memory` is True (with "tracemalloc", which slows down the run), and the
+    peak resident memory of the process so far otherwise.
+    """
+
+    settings: dict = field(default_factory=dict)
+    callback: Callable[[dict], None] = None
+    trace_memory: bool = False
+    stages: list[dict] = field(default_factory=list)
+    started: datetime = field(default_factory=datetime.now)
+
+
+    def __post_init__(self) -> None:
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+
+    @contextlib.contextmanager
+    def stage(self, name: str, league: str = None, rows: int = None):
+        """
+        Context manager that times one stage. The yielded record can be updated inside the block, e.g. with the number of rows
+        once it is known or with the number of solver iterations.
+
+        Args:
+            name (str): Name of the stage (e.g. "parse").
+            league (str, optional): String object of league abbreviation, or None for stages spanning several leagues. Defaults to None.
+            rows (int, optional): Number of rows processed by the stage. Defaults to None.
+
+        Yields:
+            dict: Record of the stage with keys "league", "stage", "rows", "iterations", and after the block "seconds",
+                "rows_per_second", and "peak_memory_mb".
+        """
+
+        record = {"league": league, "stage": name, "rows": rows, "iterations": None}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+
+        yield record
+
+        seconds = time.perf_counter() - start
+        peak_bytes = tracemalloc.get_traced_memory()[1] if self.trace_memory else get_peak_rss_bytes()
+        record["seconds"] = seconds
+        record["rows_per_second"] = record["rows"] / seconds if record["rows"] is not None and seconds > 0 else None
+        record["peak_memory_mb"] = peak_bytes / 2 ** 20
+        self.stages.append(record)
+
+        logger.info(format_stage(record))
+        if self.callback is not None:
+            self.callback(record)
+
+
+    def to_dict(self) -> dict:
+        """
+        Returns the run report as a JSON serializable dictionary.
+
+        Returns:
+            dict: Dictionary with keys "started", "total_seconds", "memory", "settings", and "stages".
+        """
+
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "total_seconds": (datetime.now() - self.started).total_seconds(),
+            "memory": "tracemalloc" if self.trace_memory else "max_rss",
+            "settings": self.settings,
+            "stages": self.stages
+        }
+
+
+    def save(self, report_file: Path) -> None:
+        """
+        Saves the run report as a JSON file.
+
+        Args:
+            report_file (Path): Path object of the JSON file.
+
+        Returns:
+            None
+        """
+
+        report_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(report_file, "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+
+
+def time_stage(report: RunReport, name: str, league: str = None, rows: int = None):
+    """
+    Times a stage with `report`, or does nothing if `report` is None, so instrumented code does not need to check for a report.
+
+    Args:
+        report (RunReport): Run report, or None.
+        name (str): Name of the stage (e.g. "parse").
+        league (str, optional): String object of league abbreviation. Defaults to None.
+        rows (int, optional): Number of rows processed by the stage. Defaults to None.
+
+    Returns:
+        contextlib.AbstractContextManager: Context manager yielding the stage record (a throwaway dictionary without `report`).
+    """
+
+    if report is None:
+        return contextlib.nullcontext({"rows": rows, "iterations": None})
+    return report.stage(name, league=league, rows=rows)
+
+
+
+def compare_run_reports(old_file: Path, new_file: Path) -> list[dict]:
+    """
+    Compares the wall time of every (league, stage) of two saved run reports, e.g. to catch performance regressions.
+
+    Args:
+        old_file (Path): Path object of the JSON file of the earlier run.
+        new_file (Path): Path object of the JSON file of the later run.
+
+    Returns:
+        list[dict]: List with one dictionary per (league, stage) of the later run with keys "league", "stage", "old_seconds",
+            "new_seconds", and "ratio" (new / old, None if the stage is missing from the earlier run).
+    """
+
+    with open(old_file) as f:
+        old_seconds = {(record["league"], record["stage"]): record["seconds"] for record in json.load(f)["stages"]}
+    with open(new_file) as f:
+        new_stages = json.load(f)["stages"]
+
+    comparison = []
+    for record in new_stages:
+        old = old_seconds.get((record["league"], record["stage"]))
+        comparison.append({
+            "league": record["league"],
+            "stage": record["stage"],
+            "old_seconds": old,
+            "new_seconds": record["seconds"],
+            "ratio": record["seconds"] / old if old else None
+        })
+    return comparison
@@ -0,0 +1,89 @@
+import numpy as np
+from pathlib import Path
+
+
+
+def save_strength_cube(season_states: dict, teams: list[str], cube_file: Path) -> None:
+    """
+    Saves the Bradley-Terry strengths of every team on every date of a league as a (season, date, team) float32 array.
+
+    The cube is saved to `cube_file` (a ".npy" file that can be memory mapped), and its index is saved next to it as
+    "{stem}_index.npz" with the arrays
+        - "seasons": season of each cube row (seasons)
+        - "n_dates": number of dates of each season; entries after them are padding (seasons)
+        - "dates": dates as days since 1970-01-01, -1 for padding (seasons x dates)
+        - "team_ids": league-wide team id of each cube column (teams)
+        - "teams": abbreviation of each cube column (teams)
+        - "home_advantage": home advantage factor of each date, NaN for padding (seasons x dates).
+    Strengths are NaN for padding, for teams that have not played yet, and for dates that were not solved.
+
+    Args:
+        season_states (dict): Dictionary mapping season to the state returned by "compute_season_bt_probs".
+        teams (list[str]): List of team abbreviations that the team ids refer to.
+        cube_file (Path): Path object of the ".npy" file where the cube is saved.
+
+    Returns:
+        None
+    """
+
+    seasons = np.array(sorted(season_states), dtype=np.int16)
+    team_ids = np.unique(np.concatenate([season_states[season]["team_ids"] for season in seasons]))
+    n_dates = np.array([len(season_states[season]["dates"]) for season in seasons], dtype=np.int32)
+
+    cube = np.full([len(seasons), n_dates.max(initial=0), len(team_ids)], np.nan, dtype=np.float32)
+    dates = np.full(cube.shape[:2], -1, dtype=np.int32)
+    home_advantage = np.full(cube.shape[:2], np.nan, dtype=np.float32)
+    for s, season in enumerate(seasons):
+        state = season_states[season]
+        cube[s, :n_dates[s]][:, np.searchsorted(team_ids, state["team_ids"])] = state["strengths"]
+        dates[s, :n_dates[s]] = np.asarray(state["dates"], dtype="datetime64[D]").astype(np.int64)
+        home_advantage[s, :n_dates[s]] = state["home_advantage"]
+
+    cube_file.parent.mkdir(parents=True, exist_ok=True)
+    np.save(cube_file, cube)
+    np.savez(
+        cube_file.with_name(f"{cube_file.stem}_index.npz"),
+        seasons=seasons, n_dates=n_dates, dates=dates, team_ids=team_ids, teams=np.array(teams)[team_ids], home_advantage=home_advantage
+    )
+
+
+
+def load_strength_cube(cube_file: Path, mmap: bool = True) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Loads a league's strength cube and its index.
+
+    Args:
+        cube_file (Path): Path object of the ".npy" file of the cube.
+        mmap (bool, optional): If True, the cube is memory mapped read-only. Defaults to True.
+
+    Returns:
+        np.ndarray: (season, date, team) float32 array of strengths.
+        dict[str, np.ndarray]: Dictionary of the index arrays described in "save_strength_cube".
+    """
+
+    cube = np.load(cube_file, mmap_mode="r" if mmap else None)
+    with np.load(cube_file.with_name(f"{cube_file.stem}_index.npz")) as index_file:
+        index = dict(index_file)
+    return cube, index
+
+
+
+def get_team_trajectory(cube: np.ndarray, index: dict[str, np.ndarray], season: int, team: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns how a team's strength evolved over the dates of one season.
+
+    Args:
+        cube (np.ndarray): Strength cube returned by "load_strength_cube".
+        index (dict[str, np.ndarray]): Index returned by "load_strength_cube".
+        season (int): Season as an integer, representing the year the season ended.
+        team (str): Team abbreviation.
+
+    Returns:
+        np.ndarray: Dates of the season as datetime64[D].
+        np.ndarray: Strength of the team before each date (NaN before its first game).
+    """
+
+    s = int(np.flatnonzero(index["seasons"] == season)[0])
+    t = int(np.flatnonzero(index["teams"] == team)[0])
+    n_dates = index["n_dates"][s]
+    return index["dates"][s, :n_dates].astype("datetime64[D]"), np.asarray(cube[s, :n_dates, t])
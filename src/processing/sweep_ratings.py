@@ -0,0 +1,298 @@
+import argparse
+import itertools
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from columnar_store import load_game_table
+from elo import ELO_REGRESSION, compute_elo_probs
+from game_table import GameTable
+from preprocessing import build_season_win_matrices, compute_season_bt_probs, get_all_team_abbrs
+
+
+
+# default grids of the sweep
+SWEEP_BT_L2 = [0.0, 0.1, 0.3, 1.0, 3.0]
+SWEEP_BT_DECAY = [0.0, 0.005, 0.01, 0.02]
+SWEEP_ELO_K = [10.0, 15.0, 20.0, 25.0, 30.0, 40.0]
+SWEEP_ELO_HOME_ADVANTAGE = [0.0, 25.0, 50.0, 75.0, 100.0, 125.0]
+SWEEP_BT_HOME_ADVANTAGE = [False]
+SWEEP_ELO_REGRESSION = [ELO_REGRESSION]
+
+# clipping of the predictions in the log loss, as in "log_loss.py"
+LOG_LOSS_EPS = 1e-15
+
+
+
+def load_sweep_games(league: str, team_abbr_file: Path) -> GameTable:
+    """
+    Loads the processed games of a league as a GameTable. The columnar store in `processed_data/columnar/{league}/` is memory mapped 
+    if it exists, and `processed_data/{league}.csv` is read otherwise.
+
+    Args:
+        league (str): String object of league abbreviation (e.g. "nfl").
+        team_abbr_file (Path): Path object of file containing dictionary mapping team names to team abbreviations.
+
+    Returns:
+        GameTable: GameTable of the games.
+    """
+
+    columnar_dir = Path(f"processed_data/columnar/{league}")
+    if columnar_dir.exists():
+        return load_game_table(columnar_dir)
+    return GameTable.from_pandas(pd.read_csv(f"processed_data/{league}.csv"), teams=get_all_team_abbrs(team_abbr_file))
+
+
+
+def get_season_frames(table: GameTable) -> dict[int, pd.DataFrame]:
+    """
+    Splits the games of a league into the per-season DataFrames used by "compute_season_bt_probs", indexed by position in `table`.
+
+    Args:
+        table (GameTable): GameTable of the games.
+
+    Returns:
+        dict[int, pd.DataFrame]: Dictionary mapping season to a DataFrame with "Date", "home_id", "away_id", "result", and "second_half" columns.
+    """
+
+    dates = table.dates().astype(str)
+    return {
+        int(season): pd.DataFrame({
+            "Date": dates[rows],
+            "home_id": table.home_id[rows],
+            "away_id": table.away_id[rows],
+            "result": table.result[rows],
+            "second_half": table.second_half[rows]
+        }, index=rows)
+        for season in np.unique(table.season)
+        for rows in [np.flatnonzero(table.season == season)]
+    }
+
+
+
+def get_score_mask(table: GameTable) -> np.ndarray:
+    """
+    Returns the games that the sweep is scored on: the second-half games with moneyline and Bradley-Terry predictions, the same games
+    that "brier_score.py" and "log_loss.py" evaluate.
+
+    Args:
+        table (GameTable): GameTable of the games.
+
+    Returns:
+        np.ndarray: Boolean mask of the scored games.
+    """
+
+    return (table.second_half == 1) & ~np.isnan(table.probs["ml"]) & ~np.isnan(table.probs["bt"])
+
+
+
+def score_predictions(probs: np.ndarray, results: np.ndarray) -> dict:
+    """
+    Computes the Brier score and log loss of probabilistic predictions, with the same definitions as "brier_score.py" and "log_loss.py".
+    Non-finite predictions are not skipped: they are counted, and the scores are NaN if there are any.
+
+    Args:
+        probs (np.ndarray): Probability that the home team wins for each game.
+        results (np.ndarray): 1 if the home team won and 0 if the away team won.
+
+    Returns:
+        dict: Dictionary with keys "brier", "log_loss", "n_games", and "n_nonfinite".
+    """
+
+    probs = np.asarray(probs, dtype=float)
+    results = np.asarray(results, dtype=float)
+    clipped = np.clip(probs, LOG_LOSS_EPS, 1 - LOG_LOSS_EPS)
+
+    return {
+        "brier": float(np.mean((probs - results) ** 2)),
+        "log_loss": float(-np.mean(results * np.log(clipped) + (1 - results) * np.log(1 - clipped))),
+        "n_games": len(probs),
+        "n_nonfinite": int((~np.isfinite(probs)).sum())
+    }
+
+
+
+def sweep_season_bt(season_df: pd.DataFrame, decay: float, l2_values: list[float], home_advantages: list[bool]) -> dict:
+    """
+    Computes second-half Bradley-Terry predictions of one season for every L2 penalty and home advantage option with one decay rate.
+    The win matrices of the season are built once and shared by all settings.
+
+    Settings without a penalty or home advantage use the default MM solver, so with a decay of 0 they reproduce "bt_prob".
+    All other settings use the Newton solver.
+
+    Args:
+        season_df (pd.DataFrame): DataFrame of the games of one season returned by "get_season_frames".
+        decay (float): Decay rate per day of the weight of past games, 0 for no decay.
+        l2_values (list[float]): List of L2 penalties.
+        home_advantages (list[bool]): List of home advantage options.
+
+    Returns:
+        dict: Dictionary mapping (l2, home_advantage) to the probability that the home team wins for each game of `season_df`.
+    """
+
+    decay = decay or None
+    win_matrices = build_season_win_matrices(season_df, decay=decay, home_advantage=any(home_advantages))
+
+    season_probs = {}
+    for l2, home_advantage in itertools.product(l2_values, home_advantages):
+        solver = "mm" if l2 == 0 and not home_advantage else "newton"
+        bt_probs, _, _ = compute_season_bt_probs(season_df, eval_subset="second_half", solver=solver, l2=l2, home_advantage=home_advantage,
+                                                 decay=decay, win_matrices=win_matrices)
+        season_probs[(l2, home_advantage)] = bt_probs.to_numpy()
+
+    return season_probs
+
+
+
+def sweep_league_elo(table: GameTable, k_values: list[float], home_advantages: list[float], regressions: list[float]) -> tuple[list[tuple], np.ndarray]:
+    """
+    Computes Elo predictions of all games of a league for every combination of settings in a single pass (see "compute_elo_probs").
+
+    Args:
+        table (GameTable): GameTable of the games.
+        k_values (list[float]): List of K-factors.
+        home_advantages (list[float]): List of home advantages in rating points.
+        regressions (list[float]): List of fractions of the distance to 1500 removed between seasons.
+
+    Returns:
+        list[tuple]: List of (k, home_advantage, regression) settings.
+        np.ndarray: (games x settings) probabilities that the home team wins.
+    """
+
+    settings = list(itertools.product(k_values, home_advantages, regressions))
+    k, home_advantage, regression = (np.array(values, dtype=float) for values in zip(*settings))
+
+    elo_probs = compute_elo_probs(table.date, table.season, table.home_id, table.away_id, table.result, k=k, home_advantage=home_advantage, regression=regression)
+    return settings, elo_probs
+
+
+
+def run_rating_sweep(leagues: list[str], team_abbr_file: Path, workers: int, bt_l2: list[float] = SWEEP_BT_L2, bt_decay: list[float] = SWEEP_BT_DECAY,
+                     bt_home_advantage: list[bool] = SWEEP_BT_HOME_ADVANTAGE, elo_k: list[float] = SWEEP_ELO_K, elo_home_advantage: list[float] = SWEEP_ELO_HOME_ADVANTAGE,
+                     elo_regression: list[float] = SWEEP_ELO_REGRESSION) -> pd.DataFrame:
+    """
+    Evaluates a grid of Bradley-Terry and Elo settings on every league and ranks them by second-half Brier score.
+
+    Every (league, season, decay) Bradley-Terry task and every league's Elo grid is run on a pool of `workers` processes.
+    The games of each league are loaded once as a GameTable, and each task builds the win matrices of its season once for all of its settings.
+    Every setting is scored on the same games, and settings with non-finite predictions on any of them get NaN scores and rank last.
+
+    Args:
+        leagues (list[str]): List of league abbreviations (e.g. ["nba", "nfl"]).
+        team_abbr_file (Path): Path object of file containing dictionary mapping team names to team abbreviations.
+        workers (int): Number of worker processes.
+        bt_l2 (list[float], optional): L2 penalties of the Bradley-Terry grid. Defaults to SWEEP_BT_L2.
+        bt_decay (list[float], optional): Decay rates per day of the Bradley-Terry grid. Defaults to SWEEP_BT_DECAY.
+        bt_home_advantage (list[bool], optional): Home advantage options of the Bradley-Terry grid. Defaults to SWEEP_BT_HOME_ADVANTAGE.
+        elo_k (list[float], optional): K-factors of the Elo grid. Defaults to SWEEP_ELO_K.
+        elo_home_advantage (list[float], optional): Home advantages in rating points of the Elo grid. Defaults to SWEEP_ELO_HOME_ADVANTAGE.
+        elo_regression (list[float], optional): Regressions to the mean of the Elo grid. Defaults to SWEEP_ELO_REGRESSION.
+
+    Returns:
+        pd.DataFrame: Leaderboard with one row per (league, model, setting) and the columns
+            - league: league abbreviation
+            - model: "ml" (moneyline, for reference), "bt", or "elo"
+            - bt_l2, bt_decay, bt_home_advantage: Bradley-Terry settings (empty for other models)
+            - elo_k, elo_home_advantage, elo_regression: Elo settings (empty for other models)
+            - brier: second-half Brier score, NaN if any prediction is not finite
+            - log_loss: second-half log loss, NaN if any prediction is not finite
+            - n_games: number of scored games
+            - n_nonfinite: number of scored games with a missing or non-finite prediction
+            - rank: rank of the Brier score within the league.
+    """
+
+    tables = {league: load_sweep_games(league, team_abbr_file) for league in leagues}
+    season_frames = {league: get_season_frames(table) for league, table in tables.items()}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+
+        # submit the largest seasons first so that they do not end up as stragglers
+        tasks = [
+            (league, season, decay, season_df)
+            for league, frames in season_frames.items()
+            for season, season_df in frames.items()
+            for decay in bt_decay
+        ]
+        tasks.sort(key=lambda task: len(task[3]), reverse=True)
+        bt_futures = {
+            (league, season, decay): executor.submit(sweep_season_bt, season_df, decay, bt_l2, bt_home_advantage)
+            for league, season, decay, season_df in tasks
+        }
+        elo_futures = {
+            league: executor.submit(sweep_league_elo, table, elo_k, elo_home_advantage, elo_regression)
+            for league, table in tables.items()
+        }
+
+        # collect the results in a fixed order
+        rows = []
+        for league, table in tables.items():
+            mask = get_score_mask(table)
+            results = table.result.astype(float)
+            rows.append({"league": league, "model": "ml", **score_predictions(table.probs["ml"][mask], results[mask])})
+
+            for decay in bt_decay:
+                bt_probs = {}
+                for season, season_df in season_frames[league].items():
+                    for setting, season_probs in bt_futures[(league, season, decay)].result().items():
+                        bt_probs.setdefault(setting, np.full(len(table), np.nan))[season_df.index] = season_probs
+
+                for (l2, home_advantage), probs in bt_probs.items():
+                    rows.append({
+                        "league": league, "model": "bt", "bt_l2": l2, "bt_decay": decay, "bt_home_advantage": home_advantage,
+                        **score_predictions(probs[mask], results[mask])
+                    })
+
+            settings, elo_probs = elo_futures[league].result()
+            for (k, home_advantage, regression), probs in zip(settings, elo_probs.T):
+                rows.append({
+                    "league": league, "model": "elo", "elo_k": k, "elo_home_advantage": home_advantage, "elo_regression": regression,
+                    **score_predictions(probs[mask], results[mask])
+                })
+
+    columns = ["league", "model", "bt_l2", "bt_decay", "bt_home_advantage", "elo_k", "elo_home_advantage", "elo_regression", "brier", "log_loss", "n_games", "n_nonfinite"]
+    leaderboard = pd.DataFrame(rows).reindex(columns=columns)
+    leaderboard["rank"] = leaderboard.groupby("league")["brier"].rank(method="min", na_option="bottom").astype(int)
+    return leaderboard.sort_values(["league", "rank"], kind="stable").reset_index(drop=True)
+
+
+
+
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leagues", nargs="+", default=["mlb", "nba", "nfl", "nhl"], help="leagues to sweep (leagues without processed data are skipped)")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--bt-l2", type=float, nargs="+", default=SWEEP_BT_L2, help="L2 penalties of the Bradley-Terry grid")
+    parser.add_argument("--bt-decay", type=float, nargs="+", default=SWEEP_BT_DECAY, help="decay rates per day of the Bradley-Terry grid (0 for no decay)")
+    parser.add_argument("--bt-home-advantage", action="store_true", help="also sweep every Bradley-Terry setting with a home advantage factor")
+    parser.add_argument("--elo-k", type=float, nargs="+", default=SWEEP_ELO_K, help="K-factors of the Elo grid")
+    parser.add_argument("--elo-home-advantage", type=float, nargs="+", default=SWEEP_ELO_HOME_ADVANTAGE, help="home advantages (rating points) of the Elo grid")
+    parser.add_argument("--elo-regression", type=float, nargs="+", default=SWEEP_ELO_REGRESSION, help="regressions to the mean between seasons of the Elo grid")
+    parser.add_argument("--output", type=Path, default=Path("results/rating_sweep.csv"), help="leaderboard CSV file")
+    args = parser.parse_args()
+
+    leagues = [league for league in args.leagues if Path(f"processed_data/{league}.csv").exists()]
+
+    start = time.perf_counter()
+    leaderboard = run_rating_sweep(
+        leagues, team_abbr_file=Path("utility/team_abbrs.json"), workers=args.workers,
+        bt_l2=args.bt_l2, bt_decay=args.bt_decay, bt_home_advantage=[False, True] if args.bt_home_advantage else SWEEP_BT_HOME_ADVANTAGE,
+        elo_k=args.elo_k, elo_home_advantage=args.elo_home_advantage, elo_regression=args.elo_regression
+    )
+    print(f"Evaluated {len(leaderboard)} settings in {time.perf_counter() - start:.1f} seconds")
+    nonfinite = leaderboard[leaderboard["n_nonfinite"] > 0]
+    if len(nonfinite):
+        print(f"Warning: {len(nonfinite)} settings have predictions that are not finite and are ranked last")
+        print(nonfinite.to_string(index=False))
+
+    for league, league_board in leaderboard.groupby("league"):
+        print(f"----{league}----")
+        print(league_board.head(5).to_string(index=False))
+        print("-----------\n")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    leaderboard.to_csv(args.output, index=False)
@@ -0,0 +1,221 @@
+import argparse
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+
+
+# columns of the raw data files written by the scrapers
+RAW_COLUMNS = ["date", "season_type", "neutral", "team_1", "team_2", "points_1", "points_2", "moneyline_1", "moneyline_2", "game_url"]
+
+MONTH_ABBRS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+
+def get_synthetic_team_names(n_teams: int) -> list[str]:
+    """
+    Returns the names of the teams of a synthetic league, e.g. "Synthetic Team 0007".
+
+    Args:
+        n_teams (int): Number of teams.
+
+    Returns:
+        list[str]: List of team names.
+    """
+
+    return [f"Synthetic Team {i:04d}" for i in range(n_teams)]
+
+
+
+def get_synthetic_team_abbrs(n_teams: int) -> dict[str, str]:
+    """
+    Returns the team abbreviation dictionary of a synthetic league in the format of `utility/team_abbrs.json`, mapping
+    normalized team names (e.g. "synthetic_team_0007") to abbreviations (e.g. "s0007").
+
+    Args:
+        n_teams (int): Number of teams.
+
+    Returns:
+        dict[str, str]: Dictionary mapping normalized team names to team abbreviations.
+    """
+
+    return {name.lower().replace(" ", "_"): f"s{i:04d}" for i, name in enumerate(get_synthetic_team_names(n_teams))}
+
+
+
+def format_raw_dates(days: np.ndarray) -> np.ndarray:
+    """
+    Formats dates in the "dd Mon yyyy" format of the raw data (e.g. "22 Jun 2025").
+
+    Args:
+        days (np.ndarray): Dates as days since 1970-01-01.
+
+    Returns:
+        np.ndarray: Formatted dates.
+    """
+
+    dates = np.asarray(days).astype("datetime64[D]")
+    years = dates.astype("datetime64[Y]")
+    months = dates.astype("datetime64[M]")
+    day = (dates - months).astype(int) + 1
+    month = (months - years).astype(int)
+    year = years.astype(int) + 1970
+
+    return np.char.add(np.char.add(np.char.add(np.char.zfill(day.astype(str), 2), " "), np.array(MONTH_ABBRS)[month]), np.char.add(" ", year.astype(str)))
+
+
+
+def format_raw_moneylines(probs: np.ndarray) -> np.ndarray:
+    """
+    Converts implied probabilities to moneylines in the format of the raw data (e.g. "-270" and "+219").
+
+    Args:
+        probs (np.ndarray): Implied probabilities.
+
+    Returns:
+        np.ndarray: Formatted moneylines.
+    """
+
+    probs = np.asarray(probs, dtype=float)
+    mls = np.where(probs >= 0.5, -100 * probs / (1 - probs), 100 * (1 - probs) / probs).round().astype(int)
+    mls = np.where(mls == -100, 100, mls)
+    return np.where(mls > 0, np.char.add("+", mls.astype(str)), mls.astype(str))
+
+
+
+def generate_synthetic_league(n_teams: int = 30, n_seasons: int = 10, games_per_season: int = 1230, last_season: int = 2025, season_days: int = 170,
+                              strength_sd: float = 0.6, strength_carryover: float = 0.7, home_advantage: float = 0.25, bookmaker_noise: float = 0.2,
+                              bookmaker_margin: float = 0.045, seed: int = 0) -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    Generates the raw games of a synthetic league in the format of `raw_data/oddsportal_{league}.csv`.
+
+    Every team has a latent log-strength per season, drawn from a normal distribution with standard deviation `strength_sd` and
+    correlated from one season to the next (`strength_carryover`). The home team of each game wins with probability
+        P = 1 / (1 + exp(-(s_home - s_away + home_advantage)))
+    which is the Bradley-Terry model with a home advantage factor of exp(home_advantage). The bookmaker's probability is P with
+    normal noise of standard deviation `bookmaker_noise` on the log-odds scale, and both moneylines include a total margin of
+    `bookmaker_margin`. The winner scores 1 + Poisson(10) points more than the loser, so there are no ties.
+
+    Each season starts in October of the previous year and its games are spread uniformly over `season_days` days. All games are
+    regular season games at the home team's venue, and the rows are ordered latest first like the scraped data.
+
+    Args:
+        n_teams (int, optional): Number of teams. Defaults to 30.
+        n_seasons (int, optional): Number of seasons. Defaults to 10.
+        games_per_season (int, optional): Number of games per season. Defaults to 1230.
+        last_season (int, optional): Year that the last season ends. Defaults to 2025.
+        season_days (int, optional): Number of days of each season. Defaults to 170.
+        strength_sd (float, optional): Standard deviation of the team log-strengths. Defaults to 0.6.
+        strength_carryover (float, optional): Correlation of a team's log-strength from one season to the next. Defaults to 0.7.
+        home_advantage (float, optional): Home advantage on the log-odds scale. Defaults to 0.25.
+        bookmaker_noise (float, optional): Standard deviation of the bookmaker's error on the log-odds scale. Defaults to 0.2.
+        bookmaker_margin (float, optional): Bookmaker profit, the amount the implied probabilities of a game sum to above 1. Defaults to 0.045.
+        seed (int, optional): Seed of the random number generator. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: DataFrame of raw games with the columns of the scraped data.
+        np.ndarray: (seasons x teams) latent log-strengths, with seasons in increasing order.
+    """
+
+    rng = np.random.default_rng(seed)
+    names = np.array(get_synthetic_team_names(n_teams))
+    slugs = np.char.replace(np.char.lower(names), " ", "-")
+    seasons = np.arange(last_season - n_seasons + 1, last_season + 1)
+
+    # latent strengths that drift from season to season
+    strengths = np.empty([n_seasons, n_teams])
+    strengths[0] = rng.normal(scale=strength_sd, size=n_teams)
+    for s in range(1, n_seasons):
+        innovation = rng.normal(scale=strength_sd * np.sqrt(1 - strength_carryover ** 2), size=n_teams)
+        strengths[s] = strength_carryover * strengths[s - 1] + innovation
+
+    # schedule: random pairs of distinct teams on random days of each season
+    n_games = n_seasons * games_per_season
+    season_idx = np.repeat(np.arange(n_seasons), games_per_season)
+    home_ids = rng.integers(n_teams, size=n_games)
+    away_ids = (home_ids + rng.integers(1, n_teams, size=n_games)) % n_teams
+    season_start = (np.array([f"{season - 1}-10-20" for season in seasons], dtype="datetime64[D]")).astype(np.int64)
+    days = season_start[season_idx] + rng.integers(season_days, size=n_games)
+
+    # results and scores
+    log_odds = strengths[season_idx, home_ids] - strengths[season_idx, away_ids] + home_advantage
+    home_won = rng.random(n_games) < 1 / (1 + np.exp(-log_odds))
+    loser_points = rng.poisson(100, size=n_games)
+    winner_points = loser_points + 1 + rng.poisson(10, size=n_games)
+
+    # bookmaker probabilities with noise and margin
+    book_prob = 1 / (1 + np.exp(-(log_odds + rng.normal(scale=bookmaker_noise, size=n_games))))
+    implied_home = np.clip(book_prob * (1 + bookmaker_margin), 0.005, 0.995)
+    implied_away = np.clip((1 - book_prob) * (1 + bookmaker_margin), 0.005, 0.995)
+
+    game_ids = np.char.zfill(np.arange(n_games).astype(str), 8)
+    season_slugs = np.char.add(np.char.add("synthetic-", (seasons - 1).astype(str)), np.char.add("-", seasons.astype(str)))[season_idx]
+    game_urls = np.char.add(np.char.add(np.char.add("https://www.oddsportal.com/basketball/usa/", season_slugs), "/"),
+                            np.char.add(np.char.add(np.char.add(slugs[home_ids], "-"), np.char.add(slugs[away_ids], "-")), np.char.add(game_ids, "/")))
+
+    raw_df = pd.DataFrame({
+        "date": format_raw_dates(days),
+        "season_type": "Regular",
+        "neutral": 0,
+        "team_1": names[home_ids],
+        "team_2": names[away_ids],
+        "points_1": np.where(home_won, winner_points, loser_points),
+        "points_2": np.where(home_won, loser_points, winner_points),
+        "moneyline_1": format_raw_moneylines(implied_home),
+        "moneyline_2": format_raw_moneylines(implied_away),
+        "game_url": game_urls
+    })
+
+    # latest games first, like the scraped data
+    order = np.argsort(-days, kind="stable")
+    return raw_df.iloc[order].reset_index(drop=True)[RAW_COLUMNS], strengths
+
+
+
+def write_synthetic_league(output_dir: Path, league: str = "synthetic", n_teams: int = 30, **kwargs) -> tuple[Path, Path]:
+    """
+    Generates a synthetic league (see "generate_synthetic_league") and writes its raw data file and team abbreviation file,
+    which can be passed to "preprocess_league_games" in place of the real files.
+
+    Args:
+        output_dir (Path): Path object of folder where the files are written.
+        league (str, optional): Name of the league, used in the file names. Defaults to "synthetic".
+        n_teams (int, optional): Number of teams. Defaults to 30.
+        **kwargs: Other arguments of "generate_synthetic_league".
+
+    Returns:
+        Path: Path object of the raw data file, `{output_dir}/oddsportal_{league}.csv`.
+        Path: Path object of the team abbreviation file, `{output_dir}/{league}_team_abbrs.json`.
+    """
+
+    raw_df, strengths = generate_synthetic_league(n_teams=n_teams, **kwargs)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    raw_data_file = output_dir / f"oddsportal_{league}.csv"
+    team_abbr_file = output_dir / f"{league}_team_abbrs.json"
+    raw_df.to_csv(raw_data_file, index=False)
+    with open(team_abbr_file, "w") as f:
+        json.dump(get_synthetic_team_abbrs(n_teams), f, indent=4)
+
+    return raw_data_file, team_abbr_file
+
+
+
+
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output-dir", type=Path, default=Path("raw_data/synthetic"), help="folder where the raw data and team abbreviation files are written")
+    parser.add_argument("--league", default="synthetic", help="name of the league used in the file names")
+    parser.add_argument("--teams", type=int, default=30, help="number of teams")
+    parser.add_argument("--seasons", type=int, default=10, help="number of seasons")
+    parser.add_argument("--games-per-season", type=int, default=1230, help="number of games per season")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random number generator")
+    args = parser.parse_args()
+
+    raw_data_file, team_abbr_file = write_synthetic_league(args.output_dir, league=args.league, n_teams=args.teams, n_seasons=args.seasons,
+                                                           games_per_season=args.games_per_season, seed=args.seed)
+    print(f"Saved {args.seasons * args.games_per_season} games to {raw_data_file} and the team abbreviations to {team_abbr_file}")